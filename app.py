@@ -1,8 +1,18 @@
-import streamlit as st
-import gspread
+import hmac
+import logging
+import time
+
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
+import streamlit as st
+
+from charts import ChartCache, score_key
+from cohort import SCORE_BINS
+from cohort_sources import CohortRegistry
+from ingest import DEFAULT_PORT, IngestServer
+from insights import ALIGNMENT_INSIGHTS, BEHAVIOR_INSIGHTS, split_insights, zone_insight
+from metrics import METRICS
+from schema import ALIGNMENT_COLUMNS, BEHAVIOR_COLUMNS, EMAIL_COLUMN, TIMESTAMP_COLUMN
+from sheet_sync import SheetSyncError
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -56,86 +66,82 @@ st.image(
 )
 
 
+# --- Instrumentation ---
+@st.cache_resource
+def configure_metrics():
+    # Off unless metrics_enabled is set; metrics_log also emits JSON log lines
+    METRICS.configure(
+        enabled=st.secrets.get("metrics_enabled", False),
+        log_events=st.secrets.get("metrics_log", False),
+    )
+    return METRICS
+
+configure_metrics()
+
+
 # --- Authentication and Data Loading (Service Account Method) ---
-@st.cache_data(ttl=30)  # Reduced to 30 seconds for fresh data
-def load_data():
+REFRESH_COOLDOWN_SECONDS = 15
+
+@st.cache_resource
+def get_cohorts():
+    # One SheetSync per cohort in secrets (or just the original sheet), shared
+    # across sessions. Each is refreshed on its own schedule on a shared,
+    # bounded pool and only fetches rows appended since its last sync. Cold
+    # starts serve the local snapshots while the first syncs run.
+    return CohortRegistry.from_secrets(st.secrets, st.secrets.get("snapshot_path")).start()
+
+@st.cache_resource
+def get_ingest_server():
+    # Only runs when ingest_token is set: the form trigger then pushes each
+    # submission here, so new respondents don't wait for the next sheet sync.
+    token = st.secrets.get("ingest_token")
+    if not token:
+        return None
+    # Optional, so a failure here (e.g. the port is taken) is logged and
+    # cached rather than breaking every page load
+    cohorts = get_cohorts()
     try:
-        creds = st.secrets["gcp_service_account"]
-        client = gspread.service_account_from_dict(creds)
-        spreadsheet = client.open("Strategic Impact Assessment Responses")
-        worksheet = spreadsheet.worksheet("Form Responses 1")
-        data = worksheet.get_all_records()
-        df = pd.DataFrame(data)
-        column_name = "Work Email Address"
-        if column_name in df.columns:
-            df[column_name] = df[column_name].astype(str).str.strip().str.lower()
-        else:
-            st.error(f"CRITICAL: The required column '{column_name}' was not found.")
-            st.stop()
-        return df
+        server = IngestServer(
+            cohorts.syncs,
+            token,
+            host=st.secrets.get("ingest_host", "127.0.0.1"),
+            port=st.secrets.get("ingest_port", DEFAULT_PORT),
+            default_cohort=cohorts.default,
+        )
+    except OSError as e:
+        logging.getLogger("si_report.ingest").warning("Ingest endpoint not started: %s", e)
+        return None
+    return server.start()
+
+def load_data(sheet_sync):
+    try:
+        return sheet_sync.get()
+    except SheetSyncError as e:
+        st.error(str(e))
+        st.stop()
     except Exception as e:
         st.error(f"An error occurred loading data: {e}")
         return None
 
 # --- Main Visualization Function ---
-def create_profile_chart(user_data):
-    # This function is complete and correct from our last version
-    # ... (omitted for brevity, no changes needed here) ...
+@st.cache_resource
+def get_chart_cache(cohort_name):
+    # Rendered charts keyed by submission and scores, one cache per cohort
+    # shared across its sessions. The "svg" renderer skips matplotlib entirely;
+    # "matplotlib" is the original one.
+    max_mb = st.secrets.get("chart_cache_max_mb", 64)
+    renderer = st.secrets.get("chart_renderer", "svg")
+    return ChartCache(max_bytes=int(max_mb * 1024 * 1024), renderer=renderer)
+
+def profile_chart_image(user_data, insights, cohort_name, cohort_medians=None):
     try:
-        labels = ['Growth Drive', 'Initiative', 'Courage', 'Strategic\nGenerosity']
-        behavior_scores = [
-            user_data['Growth Drive Score'], 
-            user_data['Initiative Score'], 
-            user_data['Courage Score'], 
-            user_data['Strategic Generosity Score']
-        ]
-        
-        alignment_labels = ['Mission', 'Values', 'Culture', 'Benefits']
-        alignment_scores = [
-            user_data['Mission Alignment Score'], 
-            user_data['Values Alignment Score'], 
-            user_data['Culture Alignment Score'], 
-            user_data['Benefits Alignment Score']
-        ]
-
-        fig = plt.figure(figsize=(14, 7))
-        ax1 = fig.add_subplot(1, 2, 1, polar=True)
-        num_vars = len(labels)
-        angles = np.linspace(0, 2 * np.pi, num_vars, endpoint=False).tolist()
-        plot_scores = behavior_scores + behavior_scores[:1]
-        plot_angles = angles + angles[:1]
-
-        ax1.set_theta_offset(np.pi / 2)
-        ax1.set_theta_direction(-1)
-        ax1.set_xticks(angles)
-        ax1.set_xticklabels(labels, size=12)
-        ax1.set_rlabel_position(0)
-        ax1.set_yticks([2, 4, 6, 8, 10])
-        ax1.set_yticklabels(["2", "4", "6", "8", "10"], color="grey", size=9)
-        ax1.set_ylim(0, 10)
-        
-        ax1.plot(plot_angles, plot_scores, color='#1f77b4', linewidth=2, linestyle='solid')
-        ax1.fill(plot_angles, plot_scores, color='#1f77b4', alpha=0.25)
-        ax1.set_title("Behavioral Shape", size=14, pad=25)
-
-        ax2 = fig.add_subplot(1, 2, 2)
-        colors = []
-        for score in alignment_scores:
-            if score <= 4: colors.append('#d62728')
-            elif score <= 7: colors.append('#ff7f0e')
-            else: colors.append('#2ca02c')
-        ax2.barh(alignment_labels, alignment_scores, color=colors)
-        ax2.set_xlim(0, 10)
-        ax2.set_title("Values Alignment", size=14, pad=20)
-        ax2.tick_params(axis='y', labelsize=12)
-        ax2.spines['top'].set_visible(False)
-        ax2.spines['right'].set_visible(False)
-        ax2.spines['left'].set_visible(False)
-        for index, value in enumerate(alignment_scores):
-            ax2.text(value + 0.2, index, str(value), color='black', fontweight='bold', va='center', size=12)
-
-        plt.tight_layout(rect=[0, 0, 1, 0.96])
-        return fig
+        chart_cache = get_chart_cache(cohort_name)
+        # Cached per submission, so each attempt in someone's history gets its own chart
+        submission = (user_data[EMAIL_COLUMN], user_data.get(TIMESTAMP_COLUMN))
+        # Drawn from the cleaned scores (blank cells count as 0), same as the insights
+        image = chart_cache.get(score_key(insights), cohort_medians, submission)
+        # st.image() only recognises SVG markup when it's passed as a string
+        return image.decode("utf-8") if chart_cache.fmt == "svg" else image
     except KeyError as e:
         st.error(f"A required column is missing for this user: {e}.")
         return None
@@ -143,113 +149,170 @@ def create_profile_chart(user_data):
         st.error(f"An error occurred while creating the chart: {e}")
         return None
 
+# --- Cohort Comparison ---
+def dimension_label(score_column):
+    return score_column.removesuffix(" Score")
+
+def show_percentiles(cohort, insights):
+    st.markdown("### How You Compare")
+    percentiles = cohort.percentiles(insights)
+    for row_columns in (BEHAVIOR_COLUMNS, ALIGNMENT_COLUMNS):
+        for col, column in zip(st.columns(len(row_columns)), row_columns):
+            col.metric(dimension_label(column), f"{percentiles[column]:.0f}")
+    st.caption(
+        f"Percentile rank among {cohort.size} respondents: the share scoring below you, "
+        "with equal scores counted half. The dashed outline and grey markers show the cohort median."
+    )
+
+def format_timestamp(timestamp):
+    return "date unknown" if pd.isna(timestamp) else timestamp.strftime("%d %b %Y, %H:%M")
+
+def choose_submission(history):
+    # Latest attempt by default; earlier ones can be picked to look back
+    if len(history) == 1:
+        return 0
+    labels = [f"Attempt {number} ({format_timestamp(timestamp)})"
+              for number, timestamp in enumerate(history.get(TIMESTAMP_COLUMN, [pd.NaT] * len(history)), 1)]
+    return st.selectbox(
+        "You've taken the assessment more than once. Showing:",
+        range(len(history)),
+        index=len(history) - 1,
+        format_func=labels.__getitem__,
+    )
+
+def show_history(history, shown):
+    st.markdown("### Your Progress Over Time")
+    if shown > 0:
+        current, previous = history.iloc[shown], history.iloc[shown - 1]
+        for row_columns in (BEHAVIOR_COLUMNS, ALIGNMENT_COLUMNS):
+            for col, column in zip(st.columns(len(row_columns)), row_columns):
+                col.metric(dimension_label(column), f"{current[column]:g}",
+                           delta=f"{current[column] - previous[column]:+g}")
+        st.caption(f"Change since your previous attempt on {format_timestamp(previous.get(TIMESTAMP_COLUMN))}.")
+    trend = history.rename(columns=dimension_label)
+    if TIMESTAMP_COLUMN in trend.columns and trend[TIMESTAMP_COLUMN].notna().all():
+        trend = trend.set_index(TIMESTAMP_COLUMN)
+    else:
+        trend = trend.drop(columns=TIMESTAMP_COLUMN, errors="ignore").set_axis(range(1, len(trend) + 1))
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**Behavioral Shape**")
+        st.line_chart(trend[[dimension_label(column) for column in BEHAVIOR_COLUMNS]], y_label="Score")
+    with col2:
+        st.markdown("**Values Alignment**")
+        st.line_chart(trend[[dimension_label(column) for column in ALIGNMENT_COLUMNS]], y_label="Score")
+
+def is_admin(query_params):
+    # The cohort overview is only shown with ?admin=<admin_token from secrets>
+    admin_token = st.secrets.get("admin_token")
+    supplied = query_params.get("admin", "")
+    return bool(admin_token) and hmac.compare_digest(str(supplied), str(admin_token))
+
+def show_metrics(cohort_name):
+    st.markdown("**Chart Cache**")
+    st.json(get_chart_cache(cohort_name).stats())
+    if METRICS.enabled:
+        with st.expander("Metrics (Prometheus text format)"):
+            st.code(METRICS.render_prometheus(), language="text")
+
+def show_cohort_overview(cohort):
+    st.header("Cohort Overview")
+    st.metric("Respondents", cohort.size)
+    st.markdown("**Zones**")
+    st.bar_chart(cohort.zone_counts)
+    st.markdown("**Score Distributions**")
+    for row_columns in (BEHAVIOR_COLUMNS, ALIGNMENT_COLUMNS):
+        for col, column in zip(st.columns(len(row_columns)), row_columns):
+            with col:
+                st.caption(dimension_label(column))
+                st.bar_chart(pd.Series(cohort.histograms[column], index=SCORE_BINS), height=200)
+
 # --- Web App Interface ---
 st.title("Your Personal Self-Reflection Profile")
-df = load_data()
-
-if df is not None:
+# ?cohort=<name> picks the organisation's sheet; links without it get the default
+cohort_name = st.query_params.get("cohort") or get_cohorts().default
+sheet_sync = get_cohorts().get(cohort_name)
+if sheet_sync is None:
+    st.error("This profile link isn't valid. Please use the link from your results email.")
+    st.stop()
+get_ingest_server()
+data = load_data(sheet_sync)
+
+if data is not None:
     # This section is correct and includes the URL parameter logic
-    email_column_name = "Work Email Address"
     name_column = "Name"
     
     query_params = st.query_params
     email_from_url = query_params.get("email", "")
 
+    if is_admin(query_params):
+        show_cohort_overview(data.cohort)
+        show_metrics(cohort_name)
+        st.divider()
+
     email = st.text_input(
         "Please enter your work email address to load your profile:",
         value=email_from_url
     )
 
     if email:
-        normalized_email = email.strip().lower()
-        user_row = df[df[email_column_name] == normalized_email]
-
-        if not user_row.empty:
-            user_data = user_row.iloc[0].to_dict()
-            
+        with METRICS.timer("stage_seconds", stage="profile_lookup"):
+            # Every submission from this email, oldest first, straight from the index
+            submissions = data.submissions(email)
+
+        if submissions:
+            history = data.history(email)
+            shown = choose_submission(history)
+            user_data = data.row(submissions[shown])
             if name_column in user_data:
                 st.header(f"Displaying Profile for: {user_data[name_column]}")
 
-            fig = create_profile_chart(user_data)
-            if fig is not None:
-                st.pyplot(fig)
+            # Strength flags, zone and cleaned scores are precomputed for everyone at load time
+            insights = data.profile_at(submissions[shown])
+
+            chart_image = profile_chart_image(user_data, insights, cohort_name, data.cohort.medians)
+            if chart_image is not None:
+                with METRICS.timer("stage_seconds", stage="chart_display"):
+                    st.image(chart_image)
+
+            show_percentiles(data.cohort, insights)
+
+            if len(history) > 1:
+                show_history(history, shown)
 
             # Add personalized insights based on user's scores
             st.markdown("### Your Personal Insights")
             
-            # Behavioral insights
-            growth_score = user_data.get('Growth Drive Score', 0)
-            initiative_score = user_data.get('Initiative Score', 0)
-            courage_score = user_data.get('Courage Score', 0)
-            generosity_score = user_data.get('Strategic Generosity Score', 0)
-            
-            # Values alignment insights
-            mission_score = user_data.get('Mission Alignment Score', 0)
-            values_score = user_data.get('Values Alignment Score', 0)
-            culture_score = user_data.get('Culture Alignment Score', 0)
-            benefits_score = user_data.get('Benefits Alignment Score', 0)
-            
             col1, col2 = st.columns(2)
             
             with col1:
                 st.markdown("**Behavioral Strengths:**")
-                if growth_score >= 7:
-                    st.success("**Growth Drive**: You embrace challenges as development opportunities!")
-                if initiative_score >= 7:
-                    st.success("**Initiative**: You naturally expand your role to create impact!")
-                if courage_score >= 7:
-                    st.success("**Courage**: You thrive in uncertain, ambiguous situations!")
-                if generosity_score >= 7:
-                    st.success("**Strategic Generosity**: You prioritize collective success!")
+                strengths, focus_areas = split_insights(insights, BEHAVIOR_INSIGHTS)
+                for message in strengths:
+                    st.success(message)
                     
                 # Show development areas if any scores are moderate/low
-                if any(score < 7 for score in [growth_score, initiative_score, courage_score, generosity_score]):
+                if focus_areas:
                     st.markdown("**Development Focus Areas:**")
-                    if growth_score < 7:
-                        st.info("**Growth Drive**: Consider seeking more challenging assignments")
-                    if initiative_score < 7:
-                        st.info("**Initiative**: Look for opportunities to propose solutions proactively")
-                    if courage_score < 7:
-                        st.info("**Courage**: Practice making decisions with incomplete information")
-                    if generosity_score < 7:
-                        st.info("**Strategic Generosity**: Explore ways to support team goals")
+                    for message in focus_areas:
+                        st.info(message)
             
             with col2:
                 st.markdown("**Values Alignment:**")
-                if mission_score >= 7:
-                    st.success("**Mission**: You're deeply connected to organizational purpose!")
-                if values_score >= 7:
-                    st.success("**Values**: Strong alignment between personal and organizational principles!")
-                if culture_score >= 7:
-                    st.success("**Culture**: You feel genuine belonging and psychological safety!")
-                if benefits_score >= 7:
-                    st.success("**Benefits**: Satisfied with compensation and development opportunities!")
+                strengths, concerns = split_insights(insights, ALIGNMENT_INSIGHTS)
+                for message in strengths:
+                    st.success(message)
                     
                 # Show alignment concerns if any scores are low
-                if any(score < 7 for score in [mission_score, values_score, culture_score, benefits_score]):
+                if concerns:
                     st.markdown("**Alignment Opportunities:**")
-                    if mission_score < 7:
-                        st.warning("**Mission**: Consider discussing organizational purpose with your manager")
-                    if values_score < 7:
-                        st.warning("**Values**: Explore ways to bring more authenticity to your work")
-                    if culture_score < 7:
-                        st.warning("**Culture**: Seek opportunities to build stronger connections")
-                    if benefits_score < 7:
-                        st.warning("**Benefits**: This may be worth discussing in your next review")
+                    for message in concerns:
+                        st.warning(message)
             
             # Overall pattern insight
             st.markdown("---")
-            behavioral_avg = (growth_score + initiative_score + courage_score + generosity_score) / 4
-            alignment_avg = (mission_score + values_score + culture_score + benefits_score) / 4
-            
-            if behavioral_avg >= 7 and alignment_avg >= 7:
-                st.success("**Peak Performance Zone**: You have both high capability and strong organizational connection!")
-            elif behavioral_avg >= 7 and alignment_avg < 7:
-                st.warning("**High Performer, Lower Alignment**: You're capable but may want to address organizational fit")
-            elif behavioral_avg < 7 and alignment_avg >= 7:
-                st.info("**High Potential**: Strong alignment suggests focused development could unlock significant growth")
-            else:
-                st.error("**Multiple Focus Areas**: Consider both skill development and organizational alignment conversations")
+            zone_kind, zone_message = zone_insight(insights)
+            getattr(st, zone_kind)(zone_message)
 
             with st.expander("How to Interpret Your Profile"):
                 st.markdown("""
@@ -405,8 +468,34 @@ if df is not None:
              col1, col2, col3 = st.columns([1, 1, 1])
              with col2:
                  if st.button("🔄 Refresh Data", help="Click if you just submitted the assessment"):
-                     st.cache_data.clear()
-                     st.rerun()
+                     # Per-session cooldown so repeated clicks don't hammer the Sheets API
+                     now = time.time()
+                     last_refresh = st.session_state.get("last_refresh_at")
+                     if last_refresh is not None and now - last_refresh < REFRESH_COOLDOWN_SECONDS:
+                         wait = REFRESH_COOLDOWN_SECONDS - (now - last_refresh)
+                         st.info(f"Please wait {wait:.0f} seconds before refreshing again.")
+                     else:
+                         st.session_state["last_refresh_at"] = now
+                         try:
+                             found = sheet_sync.lookup_fresh(email)
+                         except Exception as e:
+                             st.error(f"An error occurred refreshing data: {e}")
+                         else:
+                             if found is not None:
+                                 st.rerun()
+                             st.info("Your response hasn't arrived yet. Please try again in a minute.")
+
+# --- Data Freshness ---
+if data is not None:
+    data_age = sheet_sync.age()
+    if data_age is not None:
+        st.caption(f"Response data last synced {data_age:.0f}s ago.")
+    if sheet_sync.snapshot_info is not None:
+        info = sheet_sync.snapshot_info
+        st.caption(
+            f"Started from a local snapshot of {info['rows']} responses "
+            f"({info['age_seconds']:.0f}s old, loaded in {info['load_seconds'] * 1000:.0f} ms)."
+        )
 
 # --- Footer Section ---
 st.divider()
@@ -0,0 +1,250 @@
+"""Pre-render every respondent's profile to static files, outside Streamlit.
+
+Writes ``<id>.png`` (or ``.svg``) and ``<id>.html`` per respondent, from their
+latest submission, to the output directory, where ``<id>`` is
+``artifact_id(email)`` so email addresses never appear in file names. A
+``manifest.json`` records a fingerprint of what each artifact was rendered
+from, and later runs only re-render respondents whose latest submission,
+scores or name changed. Rendering is spread over a process pool since
+matplotlib is CPU-bound and effectively single-threaded; ``--renderer svg``
+skips matplotlib and writes SVG directly.
+
+    python batch_render.py --out rendered/                      # from the local snapshot
+    python batch_render.py --credentials sa.json --out rendered/  # straight from the sheet
+    python batch_render.py --cohort acme                          # one cohort's snapshot, to rendered/acme/
+    python batch_render.py --cohort acme --credentials sa.json --spreadsheet "Acme Assessment Responses"
+"""
+import argparse
+import concurrent.futures
+import hashlib
+import html
+import json
+import os
+import re
+import sys
+
+import numpy as np
+
+from charts import RENDERERS, render_chart
+from cohort_sources import DEFAULT_COHORT, DEFAULT_SNAPSHOT_PATH, cohort_snapshot_path
+from insights import ALIGNMENT_INSIGHTS, BEHAVIOR_INSIGHTS, split_insights, zone_insight
+from schema import NAME_COLUMN, TIMESTAMP_COLUMN
+from sheet_sync import SPREADSHEET_NAME, WORKSHEET_NAME, ResponseData, SheetSync
+from snapshot import load_snapshot
+
+# Bump when the page layout or chart changes so every artifact is re-rendered
+RENDER_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="robots" content="noindex, nofollow, noarchive, nosnippet, noimageindex, nocache">
+<title>Self-Reflection Profile</title>
+<style>
+  body {{ font-family: sans-serif; max-width: 1100px; margin: 2em auto; color: #262730; }}
+  img {{ width: 100%; border-radius: 0; }}
+  .columns {{ display: flex; gap: 2em; }}
+  .columns > div {{ flex: 1; }}
+  .callout {{ padding: 0.75em 1em; margin: 0.5em 0; border-radius: 0.5em; }}
+  .success {{ background: #dff0e0; }}
+  .info {{ background: #dde9f7; }}
+  .warning {{ background: #fff4d6; }}
+  .error {{ background: #fbe0e0; }}
+</style>
+</head>
+<body>
+<h1>Your Personal Self-Reflection Profile</h1>
+<h2>Displaying Profile for: {name}</h2>
+<img src="{image}" alt="Behavioral Shape and Values Alignment charts">
+<h3>Your Personal Insights</h3>
+<div class="columns">
+<div>
+<p><strong>Behavioral Strengths:</strong></p>
+{behavior}
+</div>
+<div>
+<p><strong>Values Alignment:</strong></p>
+{alignment}
+</div>
+</div>
+<hr>
+{zone}
+</body>
+</html>
+"""
+
+
+def artifact_id(email):
+    """File name stem for a respondent's artifacts."""
+    return hashlib.sha256(email.encode("utf-8")).hexdigest()[:20]
+
+
+def _callout(kind, message):
+    text = re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", html.escape(message))
+    return f'<div class="callout {kind}">{text}</div>'
+
+
+def _section(strengths, focus_areas, focus_title, focus_kind):
+    parts = [_callout("success", message) for message in strengths]
+    if focus_areas:
+        parts.append(f"<p><strong>{focus_title}</strong></p>")
+        parts.extend(_callout(focus_kind, message) for message in focus_areas)
+    return "\n".join(parts)
+
+
+def build_jobs(data, renderer="matplotlib"):
+    """One render job per respondent, for their latest submission.
+
+    Only what the fingerprint covers is read here, column-wise for everyone at
+    once; ``add_insights()`` fills in the page text for the jobs that actually
+    get rendered. The zone and insight text follow from the scores, so they
+    only need ``RENDER_VERSION`` bumped when their wording changes.
+    """
+    emails = list(data.submission_index)
+    latest = np.fromiter((positions[-1] for positions in data.submission_index.values()), np.intp, len(emails))
+    columns = data.frame.columns
+    names = data.frame[NAME_COLUMN].to_numpy()[latest].astype(str).tolist() if NAME_COLUMN in columns else emails
+    if TIMESTAMP_COLUMN in columns:
+        submitted = data.frame[TIMESTAMP_COLUMN].to_numpy()[latest].astype(str).tolist()
+    else:
+        submitted = latest.astype(str).tolist()
+    # Cleaned scores, so blank cells are drawn as 0 just as the insights treat them
+    scores = data.scores(latest)
+    prefix = f"{RENDER_VERSION}\0{renderer}\0".encode()
+    return [
+        {
+            "id": artifact_id(email),
+            "position": position,
+            "name": name,
+            "scores": row.tolist(),
+            "fingerprint": hashlib.sha256(prefix + f"{at}\0{name}\0".encode() + row.tobytes()).hexdigest(),
+        }
+        for email, position, name, at, row in zip(emails, latest.tolist(), names, submitted, scores)
+    ]
+
+
+def add_insights(data, jobs):
+    """Add the insight text each job's page shows, in place."""
+    profiles = data.profiles.iloc[[job["position"] for job in jobs]].to_dict("records")
+    for job, profile in zip(jobs, profiles):
+        job["behavior"] = split_insights(profile, BEHAVIOR_INSIGHTS)
+        job["alignment"] = split_insights(profile, ALIGNMENT_INSIGHTS)
+        job["zone"] = zone_insight(profile)
+
+
+def render_job(job, out_dir, fmt, renderer):
+    """Write one respondent's image and HTML page. Runs in a worker process."""
+    try:
+        image_name = f"{job['id']}.{fmt}"
+        image = render_chart(tuple(job["scores"]), renderer, fmt)
+        with open(os.path.join(out_dir, image_name), "wb") as f:
+            f.write(image)
+        page = _PAGE.format(
+            name=html.escape(job["name"]),
+            image=image_name,
+            behavior=_section(*job["behavior"], "Development Focus Areas:", "info"),
+            alignment=_section(*job["alignment"], "Alignment Opportunities:", "warning"),
+            zone=_callout(*job["zone"]),
+        )
+        with open(os.path.join(out_dir, f"{job['id']}.html"), "w", encoding="utf-8") as f:
+            f.write(page)
+        return job["id"], job["fingerprint"], None
+    except Exception as e:
+        return job["id"], None, str(e)
+
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+
+
+def load_dataset(credentials=None, snapshot_path=DEFAULT_SNAPSHOT_PATH,
+                 spreadsheet_name=SPREADSHEET_NAME, worksheet_name=WORKSHEET_NAME):
+    if credentials:
+        with open(credentials, encoding="utf-8") as f:
+            creds = json.load(f)
+        sync = SheetSync(creds, spreadsheet_name=spreadsheet_name, worksheet_name=worksheet_name)
+        return sync.refresh()
+    loaded = load_snapshot(snapshot_path)
+    if loaded is None:
+        raise FileNotFoundError(f"No usable snapshot at {snapshot_path}")
+    frame, _ = loaded
+    return ResponseData.from_frame(frame)
+
+
+def render_all(data, out_dir, fmt="png", workers=None, force=False, renderer="matplotlib"):
+    """Render every changed profile; returns ``(rendered, unchanged, failures)``."""
+    if renderer == "svg":
+        fmt = "svg"
+    elif renderer == "matplotlib":
+        # Worker processes inherit this before they first import pyplot
+        os.environ.setdefault("MPLBACKEND", "Agg")
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {} if force else load_manifest(out_dir)
+    jobs = build_jobs(data, renderer)
+    pending = [
+        job for job in jobs
+        if manifest.get(job["id"]) != job["fingerprint"]
+        or not os.path.exists(os.path.join(out_dir, f"{job['id']}.{fmt}"))
+    ]
+
+    rendered, failures = 0, {}
+    if pending:
+        add_insights(data, pending)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            chunksize = max(1, len(pending) // ((workers or os.cpu_count() or 1) * 4))
+            results = pool.map(render_job, pending, [out_dir] * len(pending), [fmt] * len(pending),
+                               [renderer] * len(pending), chunksize=chunksize)
+            for job_id, fingerprint, error in results:
+                if error is None:
+                    manifest[job_id] = fingerprint
+                    rendered += 1
+                else:
+                    manifest.pop(job_id, None)
+                    failures[job_id] = error
+        save_manifest(out_dir, manifest)
+    return rendered, len(jobs) - len(pending), failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", help="output directory (default: rendered/, or rendered/<cohort>/)")
+    parser.add_argument("--cohort", help="cohort name as configured in the app secrets")
+    parser.add_argument("--snapshot", help="Arrow snapshot to read (default: the cohort's, as the app writes it)")
+    parser.add_argument("--credentials", help="service account JSON; read the sheet instead of the snapshot")
+    parser.add_argument("--spreadsheet", default=SPREADSHEET_NAME, help="spreadsheet to read with --credentials")
+    parser.add_argument("--worksheet", default=WORKSHEET_NAME, help="worksheet to read with --credentials")
+    parser.add_argument("--format", choices=["png", "svg"], default="png",
+                        help="image format for the matplotlib renderer")
+    parser.add_argument("--renderer", choices=RENDERERS, default="matplotlib",
+                        help="'svg' draws SVG directly and is much faster; 'matplotlib' is the original chart")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="re-render everything")
+    args = parser.parse_args(argv)
+
+    snapshot = args.snapshot or cohort_snapshot_path(args.cohort or DEFAULT_COHORT)
+    out_dir = args.out or (os.path.join("rendered", args.cohort) if args.cohort else "rendered")
+    data = load_dataset(args.credentials, snapshot, args.spreadsheet, args.worksheet)
+    rendered, unchanged, failures = render_all(
+        data, out_dir, args.format, args.workers, args.force, args.renderer
+    )
+    print(f"Rendered {rendered}, unchanged {unchanged}, failed {len(failures)}")
+    for job_id, error in failures.items():
+        print(f"  {job_id}: {error}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
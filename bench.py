@@ -0,0 +1,285 @@
+"""Benchmarks for the app's hot paths against an offline synthetic sheet.
+
+Runs entirely on ``fake_sheets``, so it never touches the live spreadsheet.
+Each benchmark reports median and p95 latency plus peak traced memory at one
+or more dataset sizes::
+
+    python bench.py --rows 1000 --rows 100000
+    python bench.py --rows 100000 --json bench.json             # save results
+    python bench.py --rows 100000 --baseline bench.json          # fail on regressions
+    python bench.py --only lookup --only chart
+
+``--baseline`` exits with status 1 if any median is more than ``--tolerance``
+times the baseline's, so it can gate a deploy.
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+import fake_sheets
+from charts import ChartCache, render_chart, score_key
+from insights import ALIGNMENT_INSIGHTS, BEHAVIOR_INSIGHTS, split_insights, zone_insight
+from schema import EMAIL_COLUMN
+from scoring import score_profiles
+from sheet_sync import SheetSync, normalize_email, normalize_emails
+
+LOOKUPS_PER_ITERATION = 1000
+
+BENCHMARKS = []
+
+
+def benchmark(name, repeat=None):
+    """Register ``setup(context) -> (run, before_each)`` as a benchmark."""
+    def register(setup):
+        BENCHMARKS.append((name, setup, repeat))
+        return setup
+    return register
+
+
+class Context:
+    """Shared, lazily built fixtures for one dataset size."""
+
+    def __init__(self, rows, seed=0):
+        self.rows = rows
+        self.seed = seed
+        self._data = None
+
+    def worksheet(self):
+        return fake_sheets.FakeWorksheet.generate(self.rows, self.seed)
+
+    @property
+    def data(self):
+        if self._data is None:
+            with fake_sheets.install(self.worksheet()):
+                self._data = SheetSync({}).refresh()
+        return self._data
+
+    def sample_emails(self, count):
+        emails = list(self.data.submission_index)
+        rng = random.Random(self.seed)
+        # Raw, un-normalized input, as typed or taken from the URL
+        return [f" {rng.choice(emails).upper()} " for _ in range(count)]
+
+    def sample_rows(self, count):
+        positions = random.Random(self.seed).choices(range(len(self.data)), k=count)
+        return [self.data.frame.iloc[position].to_dict() for position in positions]
+
+
+@benchmark("load.full", repeat=3)
+def _load_full(context):
+    worksheet = context.worksheet()
+
+    def run():
+        with fake_sheets.install(worksheet):
+            SheetSync({}).refresh()
+    return run, None
+
+
+@benchmark("load.incremental_100_rows")
+def _load_incremental(context):
+    worksheet = context.worksheet()
+    with fake_sheets.install(worksheet):
+        sync = SheetSync({})
+        sync.refresh()
+
+    def before_each():
+        worksheet.append_generated(100, context.seed)
+
+    def run():
+        with fake_sheets.install(worksheet):
+            sync.refresh()
+    return run, before_each
+
+
+@benchmark("load.push_1_row")
+def _load_push(context):
+    # A pushed submission is applied to the dataset without touching the sheet
+    worksheet = context.worksheet()
+    with fake_sheets.install(worksheet):
+        sync = SheetSync({})
+        sync.refresh()
+    record = dict(zip(fake_sheets.HEADER, fake_sheets.generate_rows(1, context.seed, start=context.rows)[0]))
+    return (lambda: sync.push(record)), None
+
+
+@benchmark("normalize.emails")
+def _normalize(context):
+    raw = context.data.frame[EMAIL_COLUMN].str.upper()
+    return (lambda: normalize_emails(raw)), None
+
+
+@benchmark(f"lookup.index_x{LOOKUPS_PER_ITERATION}")
+def _lookup_index(context):
+    data = context.data
+    emails = context.sample_emails(LOOKUPS_PER_ITERATION)
+
+    def run():
+        for email in emails:
+            data.lookup(email)
+            data.profile(email)
+    return run, None
+
+
+@benchmark(f"lookup.history_x{LOOKUPS_PER_ITERATION}")
+def _lookup_history(context):
+    data = context.data
+    emails = context.sample_emails(LOOKUPS_PER_ITERATION)
+
+    def run():
+        for email in emails:
+            data.history(email)
+    return run, None
+
+
+@benchmark("lookup.mask_scan_x10")
+def _lookup_mask(context):
+    # The original per-request lookup, for comparison with the index
+    frame = context.data.frame
+    emails = [normalize_email(email) for email in context.sample_emails(10)]
+
+    def run():
+        for email in emails:
+            rows = frame[frame[EMAIL_COLUMN] == email]
+            if not rows.empty:
+                rows.iloc[0].to_dict()
+    return run, None
+
+
+@benchmark("chart.svg")
+def _chart_svg(context):
+    scores = score_key(context.sample_rows(1)[0])
+    return (lambda: render_chart(scores, "svg")), None
+
+
+@benchmark("chart.matplotlib_png", repeat=3)
+def _chart_matplotlib(context):
+    scores = score_key(context.sample_rows(1)[0])
+    return (lambda: render_chart(scores, "matplotlib", "png")), None
+
+
+@benchmark(f"chart.cache_hit_x{LOOKUPS_PER_ITERATION}")
+def _chart_cache_hit(context):
+    cache = ChartCache()
+    scores = score_key(context.sample_rows(1)[0])
+    cache.get(scores)
+
+    def run():
+        for _ in range(LOOKUPS_PER_ITERATION):
+            cache.get(scores)
+    return run, None
+
+
+@benchmark("insights.score_profiles")
+def _score_profiles(context):
+    frame = context.data.frame
+    return (lambda: score_profiles(frame)), None
+
+
+@benchmark(f"insights.messages_x{LOOKUPS_PER_ITERATION}")
+def _insight_messages(context):
+    data = context.data
+    emails = context.sample_emails(LOOKUPS_PER_ITERATION)
+
+    def run():
+        for email in emails:
+            profile = data.profile(email)
+            split_insights(profile, BEHAVIOR_INSIGHTS)
+            split_insights(profile, ALIGNMENT_INSIGHTS)
+            zone_insight(profile)
+    return run, None
+
+
+def measure(run, before_each=None, repeat=5):
+    """Return ``(timings in seconds, peak traced bytes)``."""
+    timings = []
+    for _ in range(repeat):
+        if before_each is not None:
+            before_each()
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+
+    # Memory is measured in a separate run since tracing skews the timings
+    if before_each is not None:
+        before_each()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return timings, peak
+
+
+def run_benchmarks(row_counts, repeat=5, only=None, seed=0):
+    results = []
+    for rows in row_counts:
+        context = Context(rows, seed)
+        for name, setup, fixed_repeat in BENCHMARKS:
+            if only and not any(pattern in name for pattern in only):
+                continue
+            run, before_each = setup(context)
+            timings, peak = measure(run, before_each, min(repeat, fixed_repeat or repeat))
+            timings.sort()
+            results.append({
+                "rows": rows,
+                "name": name,
+                "median_ms": statistics.median(timings) * 1000,
+                "p95_ms": timings[min(len(timings) - 1, int(round(0.95 * (len(timings) - 1))))] * 1000,
+                "peak_kib": peak / 1024,
+                "repeat": len(timings),
+            })
+            print_result(results[-1])
+    return results
+
+
+def print_result(result):
+    print(f"{result['rows']:>9,}  {result['name']:<28} median {result['median_ms']:10.3f} ms"
+          f"  p95 {result['p95_ms']:10.3f} ms  peak {result['peak_kib']:10.1f} KiB", flush=True)
+
+
+def find_regressions(results, baseline, tolerance):
+    previous = {(entry["rows"], entry["name"]): entry for entry in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get((result["rows"], result["name"]))
+        if before and result["median_ms"] > before["median_ms"] * tolerance:
+            regressions.append((result, before))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, action="append",
+                        help="synthetic respondents per run; repeatable (default: 10000)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed iterations per benchmark")
+    parser.add_argument("--only", action="append", help="run benchmarks whose name contains this")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    parser.add_argument("--baseline", help="results file from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.5,
+                        help="allowed slowdown factor against --baseline")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.rows or [10_000], args.repeat, args.only, args.seed)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        for result, before in regressions:
+            print(f"REGRESSION {result['rows']:,} {result['name']}: "
+                  f"{before['median_ms']:.3f} ms -> {result['median_ms']:.3f} ms", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+"""Profile chart rendering and a bounded cache of the rendered images.
+
+The chart only depends on the eight scores (and, optionally, the cohort
+medians drawn for comparison), so rendered images are cached by those tuples.
+Two renderers draw the same chart: ``"svg"`` writes the SVG markup directly,
+and ``"matplotlib"`` is the original figure-based renderer. matplotlib is only
+imported when that renderer is used, and its figures are closed as soon as
+they have been rasterized.
+"""
+import html
+import io
+import math
+import threading
+from collections import OrderedDict
+
+from metrics import METRICS
+from schema import ALIGNMENT_COLUMNS, BEHAVIOR_COLUMNS, SCORE_COLUMNS
+
+RENDERERS = ("svg", "matplotlib")
+
+BEHAVIOR_LABELS = ['Growth Drive', 'Initiative', 'Courage', 'Strategic\nGenerosity']
+ALIGNMENT_LABELS = ['Mission', 'Values', 'Culture', 'Benefits']
+RING_VALUES = [2, 4, 6, 8, 10]
+SHAPE_COLOR = '#1f77b4'
+MEDIAN_COLOR = 'grey'
+
+
+def alignment_color(score):
+    """Bar color for an alignment score: red up to 4, orange up to 7, green above."""
+    if score <= 4:
+        return '#d62728'
+    if score <= 7:
+        return '#ff7f0e'
+    return '#2ca02c'
+
+
+def score_key(user_data):
+    """The tuple of eight scores a profile chart is drawn from.
+
+    Pass a profile from ``ResponseData.profile()``/``profile_at()`` rather than
+    a raw row, so blank or non-numeric cells are already cleaned to 0.
+    """
+    return tuple(user_data[column] for column in SCORE_COLUMNS)
+
+
+def create_profile_chart(scores, cohort_medians=None):
+    """Draw the radar and alignment charts for a score tuple from ``score_key()``.
+
+    ``cohort_medians``, in the same order as ``scores``, adds the cohort median
+    as a dashed outline on the radar and a marker on each alignment bar. The
+    caller owns the returned figure and must close it.
+    """
+    import matplotlib.pyplot as plt
+    import numpy as np
+
+    labels = BEHAVIOR_LABELS
+    behavior_scores = list(scores[:len(BEHAVIOR_COLUMNS)])
+
+    alignment_labels = ALIGNMENT_LABELS
+    alignment_scores = list(scores[len(BEHAVIOR_COLUMNS):len(BEHAVIOR_COLUMNS) + len(ALIGNMENT_COLUMNS)])
+
+    fig = plt.figure(figsize=(14, 7))
+    ax1 = fig.add_subplot(1, 2, 1, polar=True)
+    num_vars = len(labels)
+    angles = np.linspace(0, 2 * np.pi, num_vars, endpoint=False).tolist()
+    plot_scores = behavior_scores + behavior_scores[:1]
+    plot_angles = angles + angles[:1]
+
+    ax1.set_theta_offset(np.pi / 2)
+    ax1.set_theta_direction(-1)
+    ax1.set_xticks(angles)
+    ax1.set_xticklabels(labels, size=12)
+    ax1.set_rlabel_position(0)
+    ax1.set_yticks(RING_VALUES)
+    ax1.set_yticklabels(["2", "4", "6", "8", "10"], color="grey", size=9)
+    ax1.set_ylim(0, 10)
+
+    ax1.plot(plot_angles, plot_scores, color=SHAPE_COLOR, linewidth=2, linestyle='solid')
+    ax1.fill(plot_angles, plot_scores, color=SHAPE_COLOR, alpha=0.25)
+    if cohort_medians is not None:
+        median_scores = list(cohort_medians[:len(BEHAVIOR_COLUMNS)])
+        ax1.plot(plot_angles, median_scores + median_scores[:1], color=MEDIAN_COLOR, linewidth=1.5,
+                 linestyle='dashed', label='Cohort median')
+        ax1.legend(loc='upper right', bbox_to_anchor=(1.25, 1.1), fontsize=10, frameon=False)
+    ax1.set_title("Behavioral Shape", size=14, pad=25)
+
+    ax2 = fig.add_subplot(1, 2, 2)
+    colors = [alignment_color(score) for score in alignment_scores]
+    ax2.barh(alignment_labels, alignment_scores, color=colors)
+    ax2.set_xlim(0, 10)
+    ax2.set_title("Values Alignment", size=14, pad=20)
+    ax2.tick_params(axis='y', labelsize=12)
+    ax2.spines['top'].set_visible(False)
+    ax2.spines['right'].set_visible(False)
+    ax2.spines['left'].set_visible(False)
+    for index, value in enumerate(alignment_scores):
+        ax2.text(value + 0.2, index, f"{value:g}", color='black', fontweight='bold', va='center', size=12)
+    if cohort_medians is not None:
+        median_alignment = list(cohort_medians[len(BEHAVIOR_COLUMNS):])
+        ax2.scatter(median_alignment, range(len(median_alignment)), marker='|', s=600, color=MEDIAN_COLOR,
+                    linewidths=2, zorder=3, label='Cohort median')
+        ax2.legend(loc='lower right', fontsize=10, frameon=False)
+
+    fig.tight_layout(rect=[0, 0, 1, 0.96])
+    return fig
+
+
+def render_profile_chart(scores, fmt="png", cohort_medians=None):
+    """Render the matplotlib chart to image bytes, closing the figure before returning."""
+    import matplotlib.pyplot as plt
+
+    fig = create_profile_chart(scores, cohort_medians)
+    try:
+        buffer = io.BytesIO()
+        # Same settings st.pyplot() uses when it rasterizes a figure
+        fig.savefig(buffer, format=fmt, dpi=200, bbox_inches="tight")
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+
+# Direct SVG layout, in pixels of a 14x7in figure at 100 dpi; font sizes are the
+# matplotlib point sizes converted at the same resolution.
+SVG_WIDTH, SVG_HEIGHT = 1400, 700
+RADAR_CENTER, RADAR_RADIUS = (400, 385), 230
+BARS_LEFT, BARS_RIGHT, BARS_TOP, BARS_BOTTOM = 870, 1330, 110, 640
+GRID_COLOR = '#b0b0b0'
+FONT_LABEL, FONT_TICK, FONT_TITLE, FONT_LEGEND = 16.7, 12.5, 19.4, 13.9
+
+
+def _svg_text(x, y, text, size, anchor="middle", weight="normal", color="black", baseline="middle"):
+    lines = str(text).split("\n")
+    # Center multi-line labels vertically on (x, y), like matplotlib tick labels
+    first_dy = -(len(lines) - 1) * 0.6
+    spans = "".join(
+        f'<tspan x="{x:.1f}" dy="{first_dy if i == 0 else 1.2}em">{html.escape(line)}</tspan>'
+        for i, line in enumerate(lines)
+    )
+    return (
+        f'<text x="{x:.1f}" y="{y:.1f}" font-size="{size}" text-anchor="{anchor}" '
+        f'dominant-baseline="{baseline}" font-weight="{weight}" fill="{color}">{spans}</text>'
+    )
+
+
+def _radar_point(index, count, value):
+    cx, cy = RADAR_CENTER
+    angle = 2 * math.pi * index / count
+    radius = RADAR_RADIUS * max(0.0, min(float(value), 10.0)) / 10
+    return cx + radius * math.sin(angle), cy - radius * math.cos(angle)
+
+
+def _radar_path(values):
+    points = [_radar_point(i, len(values), value) for i, value in enumerate(values)]
+    return " ".join(f"{x:.1f},{y:.1f}" for x, y in points)
+
+
+def render_profile_svg(scores, cohort_medians=None):
+    """Render the same chart as ``create_profile_chart()`` straight to SVG bytes."""
+    behavior_scores = list(scores[:len(BEHAVIOR_COLUMNS)])
+    alignment_scores = list(scores[len(BEHAVIOR_COLUMNS):len(BEHAVIOR_COLUMNS) + len(ALIGNMENT_COLUMNS)])
+    cx, cy = RADAR_CENTER
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {SVG_WIDTH} {SVG_HEIGHT}" '
+        f'width="{SVG_WIDTH}" height="{SVG_HEIGHT}" font-family="DejaVu Sans, Arial, sans-serif">',
+        f'<rect width="{SVG_WIDTH}" height="{SVG_HEIGHT}" fill="white"/>',
+    ]
+
+    # Behavioral Shape: rings at 2/4/6/8/10, one spoke per dimension
+    for ring in RING_VALUES[:-1]:
+        parts.append(f'<circle cx="{cx}" cy="{cy}" r="{RADAR_RADIUS * ring / 10:.1f}" '
+                     f'fill="none" stroke="{GRID_COLOR}" stroke-width="0.8"/>')
+    count = len(BEHAVIOR_LABELS)
+    for index, label in enumerate(BEHAVIOR_LABELS):
+        x, y = _radar_point(index, count, 10)
+        parts.append(f'<line x1="{cx}" y1="{cy}" x2="{x:.1f}" y2="{y:.1f}" stroke="{GRID_COLOR}" stroke-width="0.8"/>')
+        angle = 2 * math.pi * index / count
+        lx = cx + (RADAR_RADIUS + 30) * math.sin(angle)
+        ly = cy - (RADAR_RADIUS + 22) * math.cos(angle)
+        anchor = "middle" if abs(math.sin(angle)) < 0.5 else ("start" if math.sin(angle) > 0 else "end")
+        parts.append(_svg_text(lx, ly, label, FONT_LABEL, anchor=anchor))
+    parts.append(f'<circle cx="{cx}" cy="{cy}" r="{RADAR_RADIUS}" fill="none" stroke="black" stroke-width="1"/>')
+    for ring in RING_VALUES:
+        parts.append(_svg_text(cx + 4, cy - RADAR_RADIUS * ring / 10 - 8, ring, FONT_TICK,
+                               anchor="start", color="grey"))
+    parts.append(f'<polygon points="{_radar_path(behavior_scores)}" fill="{SHAPE_COLOR}" fill-opacity="0.25" '
+                 f'stroke="{SHAPE_COLOR}" stroke-width="2.8" stroke-linejoin="round"/>')
+    if cohort_medians is not None:
+        median_scores = list(cohort_medians[:len(BEHAVIOR_COLUMNS)])
+        parts.append(f'<polygon points="{_radar_path(median_scores)}" fill="none" stroke="{MEDIAN_COLOR}" '
+                     f'stroke-width="2.1" stroke-dasharray="8,3.5"/>')
+        lx, ly = cx + RADAR_RADIUS + 60, 75
+        parts.append(f'<line x1="{lx}" y1="{ly}" x2="{lx + 28}" y2="{ly}" stroke="{MEDIAN_COLOR}" '
+                     f'stroke-width="2.1" stroke-dasharray="8,3.5"/>')
+        parts.append(_svg_text(lx + 38, ly, "Cohort median", FONT_LEGEND, anchor="start"))
+    parts.append(_svg_text(cx, 60, "Behavioral Shape", FONT_TITLE))
+
+    # Values Alignment: horizontal bars bottom-up (Mission at the bottom), x from 0 to 10
+    width = BARS_RIGHT - BARS_LEFT
+    slot = (BARS_BOTTOM - BARS_TOP) / len(ALIGNMENT_LABELS)
+    for index, (label, value) in enumerate(zip(ALIGNMENT_LABELS, alignment_scores)):
+        center = BARS_BOTTOM - (index + 0.5) * slot
+        bar_width = width * max(0.0, min(float(value), 10.0)) / 10
+        parts.append(f'<rect x="{BARS_LEFT}" y="{center - 0.4 * slot:.1f}" width="{bar_width:.1f}" '
+                     f'height="{0.8 * slot:.1f}" fill="{alignment_color(value)}"/>')
+        parts.append(_svg_text(BARS_LEFT - 10, center, label, FONT_LABEL, anchor="end"))
+        parts.append(_svg_text(BARS_LEFT + width * (float(value) + 0.2) / 10, center, f"{value:g}", FONT_LABEL,
+                               anchor="start", weight="bold"))
+    if cohort_medians is not None:
+        median_alignment = list(cohort_medians[len(BEHAVIOR_COLUMNS):])
+        for index, value in enumerate(median_alignment):
+            center = BARS_BOTTOM - (index + 0.5) * slot
+            x = BARS_LEFT + width * float(value) / 10
+            parts.append(f'<line x1="{x:.1f}" y1="{center - 17:.1f}" x2="{x:.1f}" y2="{center + 17:.1f}" '
+                         f'stroke="{MEDIAN_COLOR}" stroke-width="2.8"/>')
+        lx, ly = BARS_RIGHT - 150, BARS_BOTTOM - 22
+        parts.append(f'<line x1="{lx}" y1="{ly - 12}" x2="{lx}" y2="{ly + 12}" stroke="{MEDIAN_COLOR}" stroke-width="2.8"/>')
+        parts.append(_svg_text(lx + 20, ly, "Cohort median", FONT_LEGEND, anchor="start"))
+    parts.append(f'<line x1="{BARS_LEFT}" y1="{BARS_BOTTOM}" x2="{BARS_RIGHT}" y2="{BARS_BOTTOM}" '
+                 f'stroke="black" stroke-width="1"/>')
+    for tick in range(0, 11, 2):
+        x = BARS_LEFT + width * tick / 10
+        parts.append(f'<line x1="{x:.1f}" y1="{BARS_BOTTOM}" x2="{x:.1f}" y2="{BARS_BOTTOM + 5}" stroke="black"/>')
+        parts.append(_svg_text(x, BARS_BOTTOM + 20, tick, FONT_LEGEND))
+    parts.append(_svg_text((BARS_LEFT + BARS_RIGHT) / 2, 80, "Values Alignment", FONT_TITLE))
+
+    parts.append("</svg>")
+    return "\n".join(parts).encode("utf-8")
+
+
+def render_chart(scores, renderer="svg", fmt="png", cohort_medians=None):
+    """Render with the chosen renderer; the SVG renderer always produces SVG."""
+    if renderer == "svg":
+        return render_profile_svg(scores, cohort_medians)
+    return render_profile_chart(scores, fmt, cohort_medians)
+
+
+class ChartCache:
+    """LRU cache of rendered chart bytes, bounded by total size in bytes."""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, fmt="png", renderer="svg"):
+        if renderer not in RENDERERS:
+            raise ValueError(f"renderer must be one of {RENDERERS}, not {renderer!r}")
+        self.max_bytes = max_bytes
+        self.renderer = renderer
+        self.fmt = "svg" if renderer == "svg" else fmt
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, scores, cohort_medians=None, submission=None):
+        """Return the rendered chart for ``scores``, rendering it on a miss.
+
+        ``submission`` (e.g. ``(email, timestamp)``) makes the entry specific
+        to one submission instead of shared by everyone with the same scores.
+        """
+        scores = tuple(scores)
+        if cohort_medians is not None:
+            cohort_medians = tuple(cohort_medians)
+        key = (submission, scores, cohort_medians)
+        with self._lock:
+            image = self._entries.get(key)
+            if image is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                METRICS.inc("chart_cache_requests_total", result="hit")
+                return image
+            self.misses += 1
+        METRICS.inc("chart_cache_requests_total", result="miss")
+
+        # Render outside the lock; two sessions racing on the same key just
+        # both render it once.
+        with METRICS.timer("stage_seconds", stage="chart_render", renderer=self.renderer):
+            image = render_chart(scores, self.renderer, self.fmt, cohort_medians)
+        with self._lock:
+            if key not in self._entries and len(image) <= self.max_bytes:
+                self._entries[key] = image
+                self.size_bytes += len(image)
+                while self.size_bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.size_bytes -= len(evicted)
+                    self.evictions += 1
+                    METRICS.inc("chart_cache_evictions_total")
+        return image
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self.size_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
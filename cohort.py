@@ -0,0 +1,44 @@
+"""Cohort-wide score distributions and percentile ranks.
+
+``CohortStats`` is built once per data load from the cleaned scores and zones,
+one row per respondent (see ``ResponseData``): one sorted array and one
+histogram per dimension plus the zone counts. A percentile is then two binary searches into
+the sorted array instead of a scan of the whole frame.
+"""
+import numpy as np
+
+from schema import SCORE_COLUMNS
+from scoring import ZONES
+
+# Scores are whole numbers on a 0-10 scale; histogram bins are 0, 1, ..., 10
+SCORE_BINS = np.arange(11)
+
+
+class CohortStats:
+    def __init__(self, scores, zones):
+        """``scores`` is a rows x ``SCORE_COLUMNS`` array, ``zones`` a Series of the matching zones."""
+        self.size = len(scores)
+        self.sorted_scores = {}
+        self.histograms = {}
+        for index, column in enumerate(SCORE_COLUMNS):
+            values = scores[:, index]
+            self.sorted_scores[column] = np.sort(values)
+            binned = np.clip(np.rint(values), SCORE_BINS[0], SCORE_BINS[-1]).astype(int)
+            self.histograms[column] = np.bincount(binned, minlength=len(SCORE_BINS))
+        self.zone_counts = zones.value_counts().reindex(ZONES, fill_value=0)
+        self.medians = None
+        if self.size:
+            self.medians = tuple(float(np.median(self.sorted_scores[column])) for column in SCORE_COLUMNS)
+
+    def percentile(self, column, score):
+        """Percent of respondents scoring below ``score`` on ``column``, ties counted half."""
+        if self.size == 0:
+            return None
+        values = self.sorted_scores[column]
+        below = np.searchsorted(values, score, side="left")
+        at_or_below = np.searchsorted(values, score, side="right")
+        return 100.0 * (below + 0.5 * (at_or_below - below)) / self.size
+
+    def percentiles(self, scores):
+        """Percentile per dimension for a mapping of score column -> score."""
+        return {column: self.percentile(column, scores[column]) for column in SCORE_COLUMNS}
@@ -0,0 +1,158 @@
+"""Several cohorts, one response sheet each, served from one deployment.
+
+Every cohort gets its own ``SheetSync`` (dataset, email index, snapshot and
+refresh interval), while authenticated gspread clients are shared through a
+``ClientPool``. ``CohortRegistry`` runs every cohort's refreshes on one bounded
+thread pool, so a large or slow cohort ties up a single worker instead of
+delaying the others.
+
+Cohorts are configured in the app secrets; without a ``[cohorts]`` table the
+original single sheet is served as the ``default`` cohort. Each cohort's
+snapshot is ``.snapshots/<name>.arrow``, except the ``default`` cohort's, which
+stays at ``.snapshots/responses.arrow``::
+
+    [cohorts.acme]
+    spreadsheet = "Acme Assessment Responses"
+    worksheet = "Form Responses 1"              # optional
+    refresh_interval = 60                       # optional, seconds
+    full_reload_interval = 600                  # optional, seconds between whole-sheet re-reads
+    credentials = "gcp_service_account"         # optional, secret holding the service account
+"""
+import concurrent.futures
+import json
+import os
+import threading
+import time
+
+import gspread
+
+from sheet_sync import SPREADSHEET_NAME, WORKSHEET_NAME, SheetSync
+
+DEFAULT_COHORT = "default"
+DEFAULT_CREDENTIALS = "gcp_service_account"
+DEFAULT_WORKERS = 4
+SNAPSHOT_DIR = ".snapshots"
+# Where the default cohort's snapshot has always lived, from before cohorts existed
+DEFAULT_SNAPSHOT_PATH = os.path.join(SNAPSHOT_DIR, "responses.arrow")
+# How often the scheduler checks which cohorts are due
+_TICK_SECONDS = 1
+
+
+def cohort_snapshot_path(name, settings=None):
+    """Where cohort ``name``'s snapshot lives unless its settings say otherwise."""
+    path = (settings or {}).get("snapshot_path")
+    if path:
+        return path
+    if name == DEFAULT_COHORT:
+        return DEFAULT_SNAPSHOT_PATH
+    return os.path.join(SNAPSHOT_DIR, f"{name}.arrow")
+
+
+class ClientPool:
+    """One authenticated gspread client per service account, shared across threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients = {}
+
+    @staticmethod
+    def _key(creds):
+        return creds.get("client_email") or json.dumps(dict(creds), sort_keys=True)
+
+    def get(self, creds):
+        key = self._key(creds)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._clients[key] = gspread.service_account_from_dict(creds)
+        return client
+
+    def discard(self, creds):
+        """Forget the client for ``creds`` so the next ``get()`` re-authenticates."""
+        with self._lock:
+            self._clients.pop(self._key(creds), None)
+
+
+class CohortRegistry:
+    """The ``SheetSync`` per cohort name, refreshed on a shared bounded pool.
+
+    Each cohort is refreshed ``refresh_interval`` seconds after its previous
+    refresh finished (or failed), and never has more than one refresh queued
+    or running.
+    """
+
+    def __init__(self, syncs, max_workers=DEFAULT_WORKERS, default=None):
+        if not syncs:
+            raise ValueError("At least one cohort is required")
+        self.syncs = dict(syncs)
+        self.default = default if default in self.syncs else next(iter(self.syncs))
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="cohort-sync"
+        )
+        self._lock = threading.Lock()
+        self._in_flight = set()
+        self._due = dict.fromkeys(self.syncs, 0.0)
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_secrets(cls, secrets, default_snapshot_path=None):
+        """Build the registry from the app secrets (see the module docstring)."""
+        clients = ClientPool()
+        configured = secrets.get("cohorts") or {DEFAULT_COHORT: {"snapshot_path": default_snapshot_path}}
+        syncs = {}
+        for name, settings in configured.items():
+            syncs[name] = SheetSync(
+                secrets[settings.get("credentials", DEFAULT_CREDENTIALS)],
+                refresh_interval=settings.get("refresh_interval", 30),
+                full_reload_interval=settings.get("full_reload_interval", 600),
+                snapshot_path=cohort_snapshot_path(name, settings),
+                spreadsheet_name=settings.get("spreadsheet", SPREADSHEET_NAME),
+                worksheet_name=settings.get("worksheet", WORKSHEET_NAME),
+                clients=clients,
+            )
+        return cls(syncs, secrets.get("cohort_fetch_workers", DEFAULT_WORKERS), secrets.get("default_cohort"))
+
+    def get(self, name):
+        """The ``SheetSync`` for cohort ``name`` (the default one if empty), or None."""
+        return self.syncs.get(name or self.default)
+
+    def start(self):
+        """Load each cohort's snapshot and start the scheduler (idempotent).
+
+        Every cohort is due immediately, so the first fetches run concurrently.
+        """
+        for sync in self.syncs.values():
+            sync.start(background=False)
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="cohort-scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            now = time.monotonic()
+            for name in self.syncs:
+                with self._lock:
+                    if name in self._in_flight or now < self._due[name]:
+                        continue
+                    self._in_flight.add(name)
+                self._executor.submit(self._refresh, name)
+            self._stop.wait(_TICK_SECONDS)
+
+    def _refresh(self, name):
+        sync = self.syncs[name]
+        try:
+            sync.refresh()
+        except Exception as e:
+            # Keep serving the cohort's last good snapshot; it's retried when next due
+            sync.last_error = e
+        finally:
+            with self._lock:
+                self._due[name] = time.monotonic() + sync.refresh_interval
+                self._in_flight.discard(name)
@@ -4,8 +4,33 @@ function sendResultsLink(e) {
   // --- CONFIGURATION ---
   // IMPORTANT: Replace this with the URL of your deployed Streamlit app
   const STREAMLIT_APP_URL = "https://woynhpxcdqkfmf5khvnjvv.streamlit.app"; 
+  // The cohort name this form's sheet is configured under in the app's
+  // secrets. Leave empty for the default cohort.
+  const COHORT = "";
+  // Optional: the app's ingest endpoint and the ingest_token from its secrets.
+  // When set, the submission is pushed to the app before the email goes out,
+  // so the profile is available as soon as the link is clicked.
+  const INGEST_URL = "";  // e.g. "https://reports.example.com/submissions"
+  const INGEST_TOKEN = "";
   // --------------------
 
+  if (INGEST_URL) {
+    try {
+      var ingestUrl = COHORT ? `${INGEST_URL}?cohort=${encodeURIComponent(COHORT)}` : INGEST_URL;
+      var response = UrlFetchApp.fetch(ingestUrl, {
+        method: 'post',
+        contentType: 'application/json',
+        headers: { Authorization: `Bearer ${INGEST_TOKEN}` },
+        payload: JSON.stringify({ namedValues: e.namedValues }),
+        muteHttpExceptions: true
+      });
+      Logger.log(`Ingest responded ${response.getResponseCode()}`);
+    } catch (error) {
+      // The app still picks the row up from the sheet; don't hold up the email
+      Logger.log(`Error pushing submission: ${error.toString()}`);
+    }
+  }
+
   try {
     // Get the email address from the form submission.
     // Make sure your Google Form question for the email is titled "Work Email Address".
@@ -20,6 +45,9 @@ function sendResultsLink(e) {
     
     // Construct the personalized URL
     var resultsUrl = `${STREAMLIT_APP_URL}/?email=${encodedEmail}`;
+    if (COHORT) {
+      resultsUrl += `&cohort=${encodeURIComponent(COHORT)}`;
+    }
     
     // Define the email subject and body
     var subject = "Your Strategic Impact Profile is Ready";
@@ -0,0 +1,142 @@
+"""Offline stand-in for the parts of gspread the app uses, with synthetic responses.
+
+``install()`` swaps ``gspread.service_account_from_dict`` for one that returns
+a ``FakeClient``, so ``SheetSync`` (and anything else going through gspread)
+reads a generated "Form Responses 1" sheet instead of the live spreadsheet::
+
+    worksheet = FakeWorksheet.generate(100_000)
+    with install(worksheet):
+        data = SheetSync({}).refresh()
+
+Cells are strings, as the Sheets API returns them with the default
+FORMATTED_VALUE rendering.
+"""
+import contextlib
+import re
+
+import gspread
+import numpy as np
+from gspread.utils import a1_to_rowcol
+
+from schema import EMAIL_COLUMN, NAME_COLUMN, SCORE_COLUMNS
+from sheet_sync import SPREADSHEET_NAME, WORKSHEET_NAME
+
+HEADER = ["Timestamp", EMAIL_COLUMN, NAME_COLUMN] + SCORE_COLUMNS + ["Comments"]
+
+_RANGE = re.compile(r"^([A-Z]+)(\d+)(?::([A-Z]+)(\d*))?$")
+_ROWS = re.compile(r"^(\d+):(\d+)$")
+
+
+def generate_rows(count, seed=0, start=0, duplicate_rate=0.02):
+    """Synthetic response rows, including messy emails and some repeat respondents."""
+    rng = np.random.default_rng(seed + start)
+    scores = rng.integers(0, 11, size=(count, len(SCORE_COLUMNS)))
+    ids = np.arange(start, start + count)
+    repeats = rng.random(count) < duplicate_rate
+    # A repeat submission reuses an earlier respondent's email
+    ids[repeats] = rng.integers(0, np.maximum(ids[repeats], 1))
+    rows = []
+    for i, (respondent, row_scores) in enumerate(zip(ids.tolist(), scores.astype(str).tolist())):
+        email = f"Respondent{respondent}@Example.com" if i % 7 == 0 else f" respondent{respondent}@example.com"
+        timestamp = f"1/{(start + i) % 28 + 1}/2025 09:{(start + i) % 60:02d}:00"
+        rows.append([timestamp, email, f"Respondent {respondent}"] + row_scores + ["Free text answer " * 3])
+    return rows
+
+
+class FakeWorksheet:
+    def __init__(self, values, title=WORKSHEET_NAME):
+        self.title = title
+        self.values = values
+        self.calls = {}
+
+    @classmethod
+    def generate(cls, count, seed=0):
+        return cls([list(HEADER)] + generate_rows(count, seed))
+
+    def append_rows(self, rows):
+        self.values.extend(rows)
+
+    def append_generated(self, count, seed=0):
+        """Simulate ``count`` new form submissions."""
+        self.append_rows(generate_rows(count, seed, start=len(self.values) - 1))
+
+    def _record(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def get_all_values(self, **kwargs):
+        self._record("get_all_values")
+        return [list(row) for row in self.values]
+
+    def get_all_records(self, **kwargs):
+        self._record("get_all_records")
+        header = self.values[0]
+        return [dict(zip(header, gspread.utils.numericise_all(row))) for row in self.values[1:]]
+
+    def row_values(self, row, **kwargs):
+        self._record("row_values")
+        return list(self.values[row - 1]) if row <= len(self.values) else []
+
+    def _get_range(self, a1_range):
+        rows = _ROWS.match(a1_range)
+        if rows is not None:
+            first_row, last_row = map(int, rows.groups())
+            return [list(row) for row in self.values[first_row - 1:last_row]]
+        match = _RANGE.match(a1_range)
+        if match is None:
+            raise ValueError(f"Unsupported range for the fake worksheet: {a1_range!r}")
+        first_col, first_row, last_col, last_row = match.groups()
+        start_row = int(first_row)
+        end_row = int(last_row) if last_row else (start_row if last_col is None else len(self.values))
+        start_col = a1_to_rowcol(f"{first_col}1")[1]
+        end_col = a1_to_rowcol(f"{last_col or first_col}1")[1]
+        return [list(row[start_col - 1:end_col]) for row in self.values[start_row - 1:end_row]]
+
+    def get(self, a1_range=None, **kwargs):
+        self._record("get")
+        return self.get_all_values() if a1_range is None else self._get_range(a1_range)
+
+    def get_values(self, a1_range=None, **kwargs):
+        return self.get(a1_range)
+
+    def batch_get(self, ranges, **kwargs):
+        self._record("batch_get")
+        return [self._get_range(a1_range) for a1_range in ranges]
+
+
+class FakeSpreadsheet:
+    def __init__(self, title, worksheets):
+        self.title = title
+        self._worksheets = {worksheet.title: worksheet for worksheet in worksheets}
+
+    def worksheet(self, title):
+        try:
+            return self._worksheets[title]
+        except KeyError:
+            raise gspread.exceptions.WorksheetNotFound(title) from None
+
+
+class FakeClient:
+    def __init__(self, spreadsheets):
+        self._spreadsheets = spreadsheets
+
+    def open(self, title, **kwargs):
+        try:
+            return self._spreadsheets[title]
+        except KeyError:
+            raise gspread.exceptions.SpreadsheetNotFound(title) from None
+
+
+@contextlib.contextmanager
+def install(worksheet, spreadsheet_name=SPREADSHEET_NAME, others=None):
+    """Route ``gspread.service_account_from_dict`` to a fake client for the duration.
+
+    ``others`` maps further spreadsheet names to worksheets, e.g. one per cohort.
+    """
+    sheets = {spreadsheet_name: worksheet, **(others or {})}
+    client = FakeClient({name: FakeSpreadsheet(name, [sheet]) for name, sheet in sheets.items()})
+    original = gspread.service_account_from_dict
+    gspread.service_account_from_dict = lambda *args, **kwargs: client
+    try:
+        yield client
+    finally:
+        gspread.service_account_from_dict = original
@@ -0,0 +1,229 @@
+"""HTTP endpoint that pushes form submissions straight into the running SheetSyncs.
+
+The form-submit trigger in ``email_trigger/code.js`` POSTs each submission here
+before it emails the results link, so the respondent's profile is served
+without waiting for the next sheet sync; the sheet is then only used to
+reconcile (see ``SheetSync.push``)::
+
+    POST /submissions?cohort=<name>
+    Authorization: Bearer <ingest_token>
+
+    {"namedValues": {"Work Email Address": ["a@example.com"], "Name": ["A"], ...}}
+
+The body is the trigger event's ``namedValues``; a flat ``{column: value}``
+object works too. Without ``cohort`` the default cohort is used.
+``GET /metrics`` serves ``METRICS`` in the Prometheus text format and
+``GET /healthz`` a small JSON status per cohort; every endpoint requires the
+bearer token.
+
+To try it locally against a synthetic sheet::
+
+    python ingest.py --fake-rows 1000 --token dev
+    curl -H 'Authorization: Bearer dev' -d @submission.json localhost:8502/submissions
+"""
+import argparse
+import contextlib
+import hmac
+import http.server
+import json
+import logging
+import sys
+import threading
+import urllib.parse
+
+from metrics import METRICS
+from schema import APP_COLUMNS, EMAIL_COLUMN, SCORE_COLUMNS
+from cohort_sources import DEFAULT_COHORT
+from sheet_sync import SheetSync, SheetSyncError
+
+DEFAULT_PORT = 8502
+MAX_BODY_BYTES = 64 * 1024
+SCORE_RANGE = (0, 10)
+
+logger = logging.getLogger("si_report.ingest")
+
+
+class SubmissionError(ValueError):
+    """Raised when a posted body isn't a usable submission."""
+
+
+def parse_submission(payload):
+    """Return the app's columns from a posted submission as ``column -> value``."""
+    if not isinstance(payload, dict):
+        raise SubmissionError("Expected a JSON object")
+    values = payload.get("namedValues", payload)
+    if not isinstance(values, dict):
+        raise SubmissionError("'namedValues' must be an object")
+
+    record = {}
+    for column in APP_COLUMNS:
+        value = values.get(column)
+        # namedValues holds a list of answers per question
+        if isinstance(value, list):
+            value = value[0] if value else None
+        if value is not None:
+            record[column] = value
+
+    if not str(record.get(EMAIL_COLUMN, "")).strip():
+        raise SubmissionError(f"Missing '{EMAIL_COLUMN}'")
+    for column in SCORE_COLUMNS:
+        try:
+            score = float(record[column])
+        except (KeyError, TypeError, ValueError):
+            raise SubmissionError(f"Missing or non-numeric '{column}'") from None
+        if not SCORE_RANGE[0] <= score <= SCORE_RANGE[1]:
+            raise SubmissionError(f"'{column}' must be between {SCORE_RANGE[0]} and {SCORE_RANGE[1]}")
+    return record
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    server_version = "si-report-ingest"
+
+    def do_GET(self):
+        if self.path not in ("/metrics", "/healthz"):
+            self._send_json(404, {"error": "Not found"})
+        elif not self._authorized():
+            self._send_json(401, {"error": "Unauthorized"})
+        elif self.path == "/metrics":
+            self._send(200, METRICS.render_prometheus().encode(), "text/plain; version=0.0.4")
+        else:
+            self._send_json(200, {
+                name: {
+                    "rows": len(sync.data) if sync.data is not None else None,
+                    "age_seconds": sync.age(),
+                    "pending_pushes": sync.pending_pushes,
+                    "last_error": str(sync.last_error) if sync.last_error else None,
+                }
+                for name, sync in self.server.cohorts.items()
+            })
+
+    def do_POST(self):
+        url = urllib.parse.urlsplit(self.path)
+        if url.path != "/submissions":
+            self._send_json(404, {"error": "Not found"})
+            return
+        if not self._authorized():
+            self._send_json(401, {"error": "Unauthorized"})
+            return
+        cohort = urllib.parse.parse_qs(url.query).get("cohort", [self.server.default_cohort])[0]
+        sync = self.server.cohorts.get(cohort)
+        if sync is None:
+            self._send_json(404, {"error": f"Unknown cohort '{cohort}'"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._send_json(400, {"error": "Invalid Content-Length"})
+            return
+        if length > MAX_BODY_BYTES:
+            self._send_json(413, {"error": "Body too large"})
+            return
+        try:
+            record = parse_submission(json.loads(self.rfile.read(length)))
+        except (ValueError, UnicodeDecodeError) as e:
+            # json.JSONDecodeError and SubmissionError are both ValueErrors
+            self._send_json(400, {"error": str(e)})
+            return
+        try:
+            with METRICS.timer("stage_seconds", stage="push"):
+                data = sync.push(record)
+        except SheetSyncError as e:
+            self._send_json(500, {"error": str(e)})
+            return
+        self._send_json(202, {"status": "applied", "rows": len(data)})
+
+    def _authorized(self):
+        supplied = self.headers.get("Authorization", "")
+        return hmac.compare_digest(supplied.encode(), f"Bearer {self.server.token}".encode())
+
+    def _send_json(self, status, body):
+        self._send(status, json.dumps(body).encode(), "application/json")
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("%s %s", self.address_string(), format % args)
+
+
+class IngestServer(http.server.ThreadingHTTPServer):
+    """Serves the endpoints above on a daemon thread once ``start()`` is called.
+
+    ``cohorts`` maps cohort name -> ``SheetSync``; ``default_cohort`` takes
+    submissions that don't name one (the first cohort if not given).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, cohorts, token, host="127.0.0.1", port=DEFAULT_PORT, default_cohort=None):
+        if not token:
+            raise ValueError("An ingest token is required")
+        super().__init__((host, port), _Handler)
+        self.cohorts = cohorts
+        self.default_cohort = default_cohort or next(iter(cohorts))
+        self.token = token
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.serve_forever, name="ingest", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--token", required=True, help="bearer token the trigger sends")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--credentials", help="service account JSON for the live sheet")
+    source.add_argument("--fake-rows", type=int, help="serve a synthetic sheet with this many rows instead")
+    parser.add_argument("--refresh-interval", type=int, default=30, help="seconds between reconciliation syncs")
+    parser.add_argument("--metrics", action="store_true", help="collect metrics for /metrics")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    METRICS.configure(enabled=args.metrics)
+    if args.fake_rows is not None:
+        import fake_sheets
+
+        sheet = fake_sheets.install(fake_sheets.FakeWorksheet.generate(args.fake_rows))
+        creds = {}
+    else:
+        with open(args.credentials, encoding="utf-8") as f:
+            creds = json.load(f)
+        sheet = contextlib.nullcontext()
+
+    with sheet:
+        sync = SheetSync(creds, refresh_interval=args.refresh_interval)
+        sync.start()
+        server = IngestServer({DEFAULT_COHORT: sync}, args.token, args.host, args.port)
+        print(f"Accepting submissions at {server.url}/submissions", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sync.stop()
+            server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
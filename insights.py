@@ -0,0 +1,68 @@
+"""Insight text shown for a scored profile.
+
+Shared by the Streamlit page and the batch renderer so both say the same
+thing. Messages use Markdown bold; ``kind`` names the Streamlit callout
+(success, info, warning or error) each one is shown in.
+"""
+from scoring import (
+    HIGH_PERFORMER,
+    HIGH_POTENTIAL,
+    MULTIPLE_FOCUS,
+    PEAK_PERFORMANCE,
+    ZONE,
+    strength_column,
+)
+
+# (score column, message when it's a strength, message when it's a focus area)
+BEHAVIOR_INSIGHTS = [
+    ("Growth Drive Score",
+     "**Growth Drive**: You embrace challenges as development opportunities!",
+     "**Growth Drive**: Consider seeking more challenging assignments"),
+    ("Initiative Score",
+     "**Initiative**: You naturally expand your role to create impact!",
+     "**Initiative**: Look for opportunities to propose solutions proactively"),
+    ("Courage Score",
+     "**Courage**: You thrive in uncertain, ambiguous situations!",
+     "**Courage**: Practice making decisions with incomplete information"),
+    ("Strategic Generosity Score",
+     "**Strategic Generosity**: You prioritize collective success!",
+     "**Strategic Generosity**: Explore ways to support team goals"),
+]
+
+ALIGNMENT_INSIGHTS = [
+    ("Mission Alignment Score",
+     "**Mission**: You're deeply connected to organizational purpose!",
+     "**Mission**: Consider discussing organizational purpose with your manager"),
+    ("Values Alignment Score",
+     "**Values**: Strong alignment between personal and organizational principles!",
+     "**Values**: Explore ways to bring more authenticity to your work"),
+    ("Culture Alignment Score",
+     "**Culture**: You feel genuine belonging and psychological safety!",
+     "**Culture**: Seek opportunities to build stronger connections"),
+    ("Benefits Alignment Score",
+     "**Benefits**: Satisfied with compensation and development opportunities!",
+     "**Benefits**: This may be worth discussing in your next review"),
+]
+
+ZONE_INSIGHTS = {
+    PEAK_PERFORMANCE: ("success", "**Peak Performance Zone**: You have both high capability and strong organizational connection!"),
+    HIGH_PERFORMER: ("warning", "**High Performer, Lower Alignment**: You're capable but may want to address organizational fit"),
+    HIGH_POTENTIAL: ("info", "**High Potential**: Strong alignment suggests focused development could unlock significant growth"),
+    MULTIPLE_FOCUS: ("error", "**Multiple Focus Areas**: Consider both skill development and organizational alignment conversations"),
+}
+
+
+def split_insights(profile, table):
+    """Return ``(strengths, focus_areas)`` messages for one insight table."""
+    strengths, focus_areas = [], []
+    for column, strength_message, focus_message in table:
+        if profile[strength_column(column)]:
+            strengths.append(strength_message)
+        else:
+            focus_areas.append(focus_message)
+    return strengths, focus_areas
+
+
+def zone_insight(profile):
+    """Return ``(kind, message)`` for the profile's overall zone."""
+    return ZONE_INSIGHTS[profile[ZONE]]
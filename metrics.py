@@ -0,0 +1,135 @@
+"""Opt-in counters and latency histograms for the load and render stages.
+
+Everything goes through the module-level ``METRICS`` registry. It starts
+disabled, in which case ``timer()`` hands back a shared no-op context manager
+and ``inc()``/``observe()`` return immediately, so instrumented code costs
+next to nothing until ``METRICS.configure(enabled=True)`` is called.
+
+Collected values can be exported in the Prometheus text format with
+``render_prometheus()``, and/or emitted as one JSON log line per event on the
+``si_report.metrics`` logger.
+"""
+import contextlib
+import json
+import logging
+import threading
+import time
+
+PREFIX = "si_report"
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+logger = logging.getLogger("si_report.metrics")
+
+_NULL_TIMER = contextlib.nullcontext()
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key, extra=None):
+    items = list(key) + list((extra or {}).items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in items) + "}"
+
+
+class _Timer:
+    __slots__ = ("_metrics", "_name", "_labels", "_started")
+
+    def __init__(self, metrics, name, labels):
+        self._metrics = metrics
+        self._name = name
+        self._labels = labels
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._metrics.observe(self._name, time.perf_counter() - self._started, **self._labels)
+        return False
+
+
+class Metrics:
+    def __init__(self):
+        self.enabled = False
+        self.log_events = False
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def configure(self, enabled=False, log_events=False):
+        self.enabled = bool(enabled)
+        self.log_events = bool(log_events) and self.enabled
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def inc(self, name, amount=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+        if self.log_events:
+            logger.info(json.dumps({"metric": name, "type": "counter", "amount": amount, **labels}))
+
+    def observe(self, name, seconds, **labels):
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {"buckets": [0] * len(BUCKETS), "count": 0, "sum": 0.0}
+            for index, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    histogram["buckets"][index] += 1
+                    break
+            histogram["count"] += 1
+            histogram["sum"] += seconds
+        if self.log_events:
+            logger.info(json.dumps({"metric": name, "type": "timing", "seconds": round(seconds, 6), **labels}))
+
+    def timer(self, name, **labels):
+        """Context manager that observes the duration of its block under ``name``."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def render_prometheus(self):
+        """All collected metrics in the Prometheus text exposition format."""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: {**value, "buckets": list(value["buckets"])}
+                          for key, value in self._histograms.items()}
+        lines = []
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f"# TYPE {PREFIX}_{name} counter")
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{PREFIX}_{name}{_format_labels(labels)} {value}")
+        for name in sorted({name for name, _ in histograms}):
+            lines.append(f"# TYPE {PREFIX}_{name} histogram")
+            for (metric, labels), histogram in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram["buckets"]):
+                    cumulative += count
+                    lines.append(f"{PREFIX}_{name}_bucket{_format_labels(labels, {'le': bound})} {cumulative}")
+                lines.append(f"{PREFIX}_{name}_bucket{_format_labels(labels, {'le': '+Inf'})} {histogram['count']}")
+                lines.append(f"{PREFIX}_{name}_sum{_format_labels(labels)} {histogram['sum']:.6f}")
+                lines.append(f"{PREFIX}_{name}_count{_format_labels(labels)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
@@ -0,0 +1,22 @@
+"""Columns of the assessment response sheet that the app reads."""
+
+TIMESTAMP_COLUMN = "Timestamp"
+EMAIL_COLUMN = "Work Email Address"
+NAME_COLUMN = "Name"
+BEHAVIOR_COLUMNS = [
+    "Growth Drive Score",
+    "Initiative Score",
+    "Courage Score",
+    "Strategic Generosity Score",
+]
+ALIGNMENT_COLUMNS = [
+    "Mission Alignment Score",
+    "Values Alignment Score",
+    "Culture Alignment Score",
+    "Benefits Alignment Score",
+]
+SCORE_COLUMNS = BEHAVIOR_COLUMNS + ALIGNMENT_COLUMNS
+
+# The only columns the app keeps in memory; everything else in the sheet
+# (free-text answers, etc.) is dropped when rows are ingested.
+APP_COLUMNS = [TIMESTAMP_COLUMN, EMAIL_COLUMN, NAME_COLUMN] + SCORE_COLUMNS
@@ -0,0 +1,61 @@
+"""Vectorized scoring and insight classification for every respondent at once.
+
+``score_profiles()`` runs once per data load and produces, per row, a
+strength flag per dimension, the behavioral and alignment averages and the
+overall zone. The cleaned scores themselves aren't copied into it; they are
+read from the compact int8 frame when needed (``ResponseData.scores()``).
+"""
+import numpy as np
+import pandas as pd
+
+from schema import ALIGNMENT_COLUMNS, BEHAVIOR_COLUMNS, SCORE_COLUMNS
+
+STRENGTH_THRESHOLD = 7
+
+BEHAVIORAL_AVERAGE = "Behavioral Average"
+ALIGNMENT_AVERAGE = "Alignment Average"
+ZONE = "Zone"
+
+PEAK_PERFORMANCE = "Peak Performance"
+HIGH_PERFORMER = "High Performer, Lower Alignment"
+HIGH_POTENTIAL = "High Potential"
+MULTIPLE_FOCUS = "Multiple Focus Areas"
+ZONES = [PEAK_PERFORMANCE, HIGH_PERFORMER, HIGH_POTENTIAL, MULTIPLE_FOCUS]
+
+
+def strength_column(score_column):
+    return f"{score_column} Strength"
+
+
+def numeric_scores(frame):
+    """The eight score columns as float32; missing or non-numeric cells count as 0."""
+    scores = frame.reindex(columns=SCORE_COLUMNS)
+    return scores.apply(pd.to_numeric, errors="coerce").fillna(0).astype("float32")
+
+
+def score_profiles(frame):
+    """Return a frame aligned with ``frame`` holding the precomputed insight fields.
+
+    Scores are only read here, not stored: the result has the derived columns alone.
+    """
+    scores = numeric_scores(frame)
+    values = scores.to_numpy()
+    strong = values >= STRENGTH_THRESHOLD
+
+    behavioral_avg = scores[BEHAVIOR_COLUMNS].to_numpy().mean(axis=1)
+    alignment_avg = scores[ALIGNMENT_COLUMNS].to_numpy().mean(axis=1)
+    high_behavior = behavioral_avg >= STRENGTH_THRESHOLD
+    high_alignment = alignment_avg >= STRENGTH_THRESHOLD
+    zone = np.select(
+        [high_behavior & high_alignment, high_behavior, high_alignment],
+        [PEAK_PERFORMANCE, HIGH_PERFORMER, HIGH_POTENTIAL],
+        default=MULTIPLE_FOCUS,
+    )
+
+    profiles = pd.DataFrame(index=pd.RangeIndex(len(scores)))
+    for position, column in enumerate(SCORE_COLUMNS):
+        profiles[strength_column(column)] = strong[:, position]
+    profiles[BEHAVIORAL_AVERAGE] = behavioral_avg
+    profiles[ALIGNMENT_AVERAGE] = alignment_avg
+    profiles[ZONE] = pd.Categorical(zone, categories=ZONES)
+    return profiles
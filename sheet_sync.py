@@ -0,0 +1,581 @@
+"""Incremental loading of the assessment response worksheet.
+
+"Form Responses 1" only ever has rows appended to it, so after the first full
+load we only fetch the rows below the last one we ingested and append them to
+the in-memory frame. A full reload happens when the header changes, when the
+sheet no longer lines up with what we ingested (e.g. rows were deleted), and
+every ``full_reload_interval`` seconds regardless, since responses edited in
+place above the tail are invisible to the incremental fetch.
+
+Submissions can also be pushed in as they happen (see ``ingest.py``). Pushed
+rows are served straight away and held as pending on top of the sheet data
+until a sync finds them in the sheet, so the sheet only has to reconcile.
+
+Only the columns the app reads are kept (``schema.APP_COLUMNS``): scores as
+int8, emails as interned strings shared with the lookup index, timestamps as
+datetime64. Every submission is kept, indexed per email in timestamp order;
+lookups by email return the latest one.
+"""
+import sys
+import threading
+import time
+from collections import Counter
+
+import gspread
+import numpy as np
+import pandas as pd
+from gspread.utils import rowcol_to_a1
+
+from cohort import CohortStats
+from metrics import METRICS
+from schema import APP_COLUMNS, EMAIL_COLUMN, SCORE_COLUMNS, TIMESTAMP_COLUMN
+from scoring import ZONE, score_profiles
+from snapshot import load_snapshot, save_snapshot
+
+SPREADSHEET_NAME = "Strategic Impact Assessment Responses"
+WORKSHEET_NAME = "Form Responses 1"
+# How Google Forms writes the Timestamp column (US locale); anything else
+# falls back to pandas' per-cell parsing
+TIMESTAMP_FORMAT = "%m/%d/%Y %H:%M:%S"
+
+
+class SheetSyncError(Exception):
+    """Raised when the response sheet can't be turned into a usable dataset."""
+
+
+def normalize_email(email):
+    return str(email).strip().lower()
+
+
+def normalize_emails(series):
+    return series.astype(str).str.strip().str.lower()
+
+
+def _pad(row, width):
+    row = list(row[:width])
+    return row + [""] * (width - len(row))
+
+
+def _trim(row):
+    """``row`` without trailing empty cells, which the Sheets API leaves out."""
+    row = list(row)
+    while row and row[-1] == "":
+        row.pop()
+    return row
+
+
+def _record_fetch(mode, rows):
+    METRICS.inc("sheet_rows_fetched_total", len(rows), mode=mode)
+    METRICS.inc("sheet_bytes_fetched_total", sum(len(cell.encode()) for row in rows for cell in row), mode=mode)
+
+
+def _compact_scores(series):
+    """Whole-number scores as int8 (Int8 if any are blank), anything else as float32."""
+    if pd.api.types.is_integer_dtype(series) and series.dtype.itemsize == 1:
+        return series
+    numeric = pd.to_numeric(series, errors="coerce")
+    valid = numeric.dropna()
+    if not ((valid % 1 == 0) & valid.between(-128, 127)).all():
+        return numeric.astype("float32")
+    return numeric.astype("Int8" if len(valid) < len(numeric) else "int8")
+
+
+def _compact_emails(series):
+    # Interned so the frame and the email index keys share one string per address
+    return pd.Series([sys.intern(email) for email in normalize_emails(series)], index=series.index, dtype=object)
+
+
+def _parse_timestamps(series):
+    if pd.api.types.is_datetime64_dtype(series):
+        return series
+    parsed = pd.to_datetime(series, format=TIMESTAMP_FORMAT, errors="coerce")
+    retry = parsed.isna() & (series.astype(str).str.strip() != "")
+    if retry.any():
+        parsed[retry] = pd.to_datetime(series[retry], format="mixed", errors="coerce")
+    return parsed
+
+
+def compact_frame(frame):
+    """Keep only ``APP_COLUMNS``, with small score dtypes and interned emails."""
+    if EMAIL_COLUMN not in frame.columns:
+        raise SheetSyncError(f"CRITICAL: The required column '{EMAIL_COLUMN}' was not found.")
+    compact = pd.DataFrame(index=pd.RangeIndex(len(frame)))
+    for column in APP_COLUMNS:
+        if column not in frame.columns:
+            continue
+        values = frame[column].reset_index(drop=True)
+        if column == EMAIL_COLUMN:
+            with METRICS.timer("stage_seconds", stage="email_normalize"):
+                compact[column] = _compact_emails(values)
+        elif column in SCORE_COLUMNS:
+            compact[column] = _compact_scores(values)
+        elif column == TIMESTAMP_COLUMN:
+            compact[column] = _parse_timestamps(values)
+        else:
+            compact[column] = values.astype(str)
+    return compact
+
+
+def _records_frame(header, rows):
+    with METRICS.timer("stage_seconds", stage="frame_build"):
+        # Only the cells of the columns the app reads are parsed at all
+        positions = {column: index for index, column in enumerate(header) if column in APP_COLUMNS}
+        columns = {
+            column: pd.Series([row[index] if index < len(row) else "" for row in rows], dtype=object)
+            for column, index in positions.items()
+        }
+        frame = pd.DataFrame(columns, index=pd.RangeIndex(len(rows)))
+    return compact_frame(frame)
+
+
+def _row_keys(frame):
+    """``(email, scores)`` per row, for matching pushed rows against the sheet."""
+    scores = frame.reindex(columns=SCORE_COLUMNS).astype("float32").fillna(-1).to_numpy().tolist()
+    return list(zip(frame[EMAIL_COLUMN], map(tuple, scores)))
+
+
+def _contains_row(data, key):
+    """Whether ``data`` already holds a submission matching ``_row_keys()`` entry ``key``."""
+    positions = list(data.submission_index.get(key[0], ()))
+    return bool(positions) and key in _row_keys(data.frame.iloc[positions])
+
+
+def submission_order(frame):
+    """A sort key per row: its timestamp, with rows lacking one after the rest."""
+    if TIMESTAMP_COLUMN not in frame.columns:
+        return np.arange(len(frame))
+    order = frame[TIMESTAMP_COLUMN].to_numpy(dtype="datetime64[us]").view("i8").copy()
+    order[order == np.iinfo(np.int64).min] = np.iinfo(np.int64).max
+    return order
+
+
+def index_submissions(emails, order, index, offset=0):
+    """Add ``email -> (row positions)`` entries to ``index`` in place, oldest first.
+
+    ``order`` is ``submission_order()`` of the whole frame, so appended rows
+    land among earlier ones by timestamp. Entries are replaced rather than
+    mutated, so a shallow copy of ``index`` taken earlier stays valid.
+    """
+    repeated = set()
+    for position, email in enumerate(emails, offset):
+        if not email:
+            continue
+        previous = index.get(email)
+        if previous is None:
+            index[email] = (position,)
+        else:
+            index[email] = previous + (position,)
+            repeated.add(email)
+    for email in repeated:
+        index[email] = tuple(sorted(index[email], key=lambda position: (order[position], position)))
+    return index
+
+
+class ResponseData:
+    """A loaded snapshot of the sheet with an O(1) lookup by normalized email.
+
+    ``submission_index`` maps each email to all of its submissions in
+    timestamp order; ``lookup()``/``profile()`` return the latest one, the
+    same one the page and the batch renderer show.
+
+    ``profiles`` holds the precomputed insight fields from ``score_profiles()``,
+    aligned row for row with ``frame``; the cleaned scores are derived from the
+    int8 frame on demand by ``scores()``. ``cohort`` holds the distributions built
+    from each respondent's latest submission, so people who retook the
+    assessment are counted once; pass an existing ``cohort`` to reuse it as is.
+    """
+
+    def __init__(self, frame, profiles=None, submission_index=None, cohort=None):
+        self.frame = frame
+        if submission_index is None:
+            with METRICS.timer("stage_seconds", stage="submission_index"):
+                submission_index = index_submissions(frame[EMAIL_COLUMN], submission_order(frame), {})
+        self.submission_index = submission_index
+        if profiles is None:
+            with METRICS.timer("stage_seconds", stage="scoring"):
+                profiles = score_profiles(frame)
+        self.profiles = profiles
+        if cohort is None:
+            with METRICS.timer("stage_seconds", stage="cohort_stats"):
+                latest = np.sort(np.fromiter((positions[-1] for positions in submission_index.values()), np.intp))
+                cohort = CohortStats(self.scores(latest), self.profiles[ZONE].iloc[latest])
+        self.cohort = cohort
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Build from a frame that hasn't been compacted or indexed yet (e.g. a snapshot)."""
+        return cls(compact_frame(frame))
+
+    def append(self, new_frame, new_profiles=None, cohort=None):
+        """Return a new ``ResponseData`` with the (compacted) rows of ``new_frame`` added.
+
+        ``new_profiles`` are the rows' ``score_profiles()`` if already computed.
+        ``cohort`` is kept instead of rebuilding the stats over every row.
+        """
+        if new_frame.empty:
+            return self
+        frame = pd.concat([self.frame, new_frame], ignore_index=True)
+        with METRICS.timer("stage_seconds", stage="submission_index"):
+            # Copy rather than extend the index so this snapshot stays valid
+            submission_index = index_submissions(
+                new_frame[EMAIL_COLUMN], submission_order(frame), dict(self.submission_index), offset=len(self)
+            )
+        if new_profiles is None:
+            with METRICS.timer("stage_seconds", stage="scoring"):
+                new_profiles = score_profiles(new_frame)
+        profiles = pd.concat([self.profiles, new_profiles], ignore_index=True)
+        return ResponseData(frame, profiles, submission_index, cohort)
+
+    def __len__(self):
+        return len(self.frame)
+
+    def position(self, email):
+        """Row position of the latest submission from ``email``, or None."""
+        submissions = self.submissions(email)
+        return submissions[-1] if submissions else None
+
+    def lookup(self, email):
+        """Return the row for ``email`` as a dict, or None if it isn't in the sheet."""
+        position = self.position(email)
+        if position is None:
+            return None
+        return self.row(position)
+
+    def profile(self, email):
+        """Return the precomputed insight fields for ``email``, or None."""
+        position = self.position(email)
+        if position is None:
+            return None
+        return self.profile_at(position)
+
+    def row(self, position):
+        return self.frame.iloc[position].to_dict()
+
+    def profile_at(self, position):
+        """The cleaned scores and insight fields of the row at ``position``."""
+        profile = dict(zip(SCORE_COLUMNS, self.scores([position])[0].tolist()))
+        profile.update(self.profiles.iloc[position].to_dict())
+        return profile
+
+    def scores(self, positions=None):
+        """Cleaned scores of the rows at ``positions`` (all rows by default) as float32, blank cells as 0.
+
+        Read column by column from the compact frame, so only the requested
+        rows are ever converted.
+        """
+        positions = np.arange(len(self)) if positions is None else np.asarray(positions, dtype=np.intp)
+        scores = np.zeros((len(positions), len(SCORE_COLUMNS)), dtype="float32")
+        for index, column in enumerate(SCORE_COLUMNS):
+            if column in self.frame.columns:
+                scores[:, index] = self.frame[column].array[positions].to_numpy(dtype="float32", na_value=0)
+        return scores
+
+    def submissions(self, email):
+        """Row positions of every submission from ``email``, oldest first."""
+        return self.submission_index.get(normalize_email(email), ())
+
+    def history(self, email):
+        """Timestamp and cleaned scores of every submission from ``email``, oldest first."""
+        positions = list(self.submissions(email))
+        history = pd.DataFrame(self.scores(positions), columns=SCORE_COLUMNS)
+        if TIMESTAMP_COLUMN in self.frame.columns:
+            # Plain array indexing; going through .iloc costs more than the read itself
+            history.insert(0, TIMESTAMP_COLUMN, self.frame[TIMESTAMP_COLUMN].to_numpy()[positions])
+        return history
+
+
+class SheetSync:
+    """Keeps a DataFrame of the response sheet up to date with minimal fetches.
+
+    Readers get the last good ``ResponseData`` snapshot immediately; a
+    background thread started by ``start()`` refreshes it every
+    ``refresh_interval`` seconds and swaps the new snapshot in. Only one fetch
+    runs at a time, and callers that ask for a refresh while one is in flight
+    wait for it instead of starting their own.
+
+    Snapshots are never mutated in place, so callers can hold on to one across
+    reruns. With ``snapshot_path`` set, each change is also written to a local
+    Arrow file that ``start()`` serves from on the next cold start.
+
+    ``push()`` applies a submitted row immediately, unless a sync has already
+    brought it in. It stays pending on top of the sheet data until a sync finds
+    the same row in the sheet, and is dropped if that hasn't happened within
+    ``push_ttl`` seconds. Pending rows aren't counted in ``cohort`` until the
+    sheet has them, so a push never rebuilds the cohort stats.
+
+    Every ``full_reload_interval`` seconds (and on the first sync after a
+    snapshot restore) the whole sheet is re-read, so responses edited in place
+    are picked up.
+
+    ``clients`` is an optional ``cohort_sources.ClientPool`` to share
+    authenticated gspread clients with other syncs.
+    """
+
+    def __init__(self, creds, refresh_interval=30, snapshot_path=None, push_ttl=600,
+                 spreadsheet_name=SPREADSHEET_NAME, worksheet_name=WORKSHEET_NAME, clients=None,
+                 full_reload_interval=600):
+        self.refresh_interval = refresh_interval
+        self.snapshot_path = snapshot_path
+        self.push_ttl = push_ttl
+        self.full_reload_interval = full_reload_interval
+        self.spreadsheet_name = spreadsheet_name
+        self.worksheet_name = worksheet_name
+        self.snapshot_info = None
+        self._creds = creds
+        self._clients = clients
+        self._worksheet_handle = None
+        self._fetch_lock = threading.Lock()
+        # Guards publishing ``data`` and the pending pushed rows; never held during a fetch
+        self._publish_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.data = None
+        self._sheet_data = None
+        self._pending = []
+        self.header = None
+        self.rows_ingested = 0
+        self.full_reloads = 0
+        self.incremental_syncs = 0
+        self.last_error = None
+        self._last_row = None
+        self._synced_at = None
+        self._full_reloaded_at = None
+
+    def _worksheet(self):
+        if self._worksheet_handle is None:
+            if self._clients is not None:
+                client = self._clients.get(self._creds)
+            else:
+                client = gspread.service_account_from_dict(self._creds)
+            spreadsheet = client.open(self.spreadsheet_name)
+            self._worksheet_handle = spreadsheet.worksheet(self.worksheet_name)
+        return self._worksheet_handle
+
+    def get(self):
+        """Return the current snapshot, loading it first if there isn't one yet."""
+        data = self.data
+        if data is None:
+            data = self.refresh()
+        return data
+
+    def refresh(self):
+        """Sync with the sheet now and return the resulting snapshot.
+
+        If another fetch is already running this waits for it and returns its
+        result rather than fetching again.
+        """
+        requested_at = time.monotonic()
+        with self._fetch_lock:
+            if self._synced_at is None or self._synced_at < requested_at:
+                self._sync()
+            return self.data
+
+    def lookup_fresh(self, email, max_age=5):
+        """Look ``email`` up, pulling newly appended rows first if it's missing.
+
+        Meant for "I just submitted" refreshes: the fetch is the same tail-only
+        sync the background thread does, shared with any concurrent callers, and
+        skipped entirely if the snapshot is less than ``max_age`` seconds old.
+        """
+        data = self.get()
+        row = data.lookup(email)
+        if row is None and (self.age() is None or self.age() >= max_age):
+            row = self.refresh().lookup(email)
+        return row
+
+    def push(self, record):
+        """Apply one submitted row (column name -> cell value) to ``data`` right away."""
+        row = _records_frame(list(record), [list(record.values())])
+        key = _row_keys(row)[0]
+        profile = score_profiles(row)
+        with self._publish_lock:
+            # The trigger fires after Forms has written the row, so a sync can
+            # beat the push to it; applying it again would duplicate it until
+            # push_ttl ran out.
+            if self._sheet_data is not None and _contains_row(self._sheet_data, key):
+                METRICS.inc("pushed_rows_total", result="already_synced")
+                return self.data
+            if self.data is None:
+                self.data = ResponseData(row, profile)
+            else:
+                self.data = self.data.append(row, profile, self.data.cohort)
+            self._pending.append((key, row, profile, time.monotonic()))
+        METRICS.inc("pushed_rows_total", result="applied")
+        return self.data
+
+    @property
+    def pending_pushes(self):
+        """Pushed rows the sheet hasn't caught up with yet."""
+        return len(self._pending)
+
+    def age(self):
+        """Seconds since the current snapshot was synced, or None before the first load."""
+        if self._synced_at is None:
+            return None
+        return time.monotonic() - self._synced_at
+
+    def start(self, background=True):
+        """Start the background refresher thread (idempotent).
+
+        If there's no data yet and a local snapshot exists, it is loaded first
+        so readers are served straight away while the thread reconciles it
+        with the sheet. ``background=False`` only loads the snapshot, for
+        callers that schedule ``refresh()`` themselves.
+        """
+        if self._sheet_data is None and self.snapshot_path:
+            self._restore_snapshot()
+        if not background:
+            return
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sheet-sync", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep serving the last good snapshot; the next tick retries
+                self.last_error = e
+            if self._stop.wait(self.refresh_interval):
+                break
+
+    def _restore_snapshot(self):
+        with self._fetch_lock:
+            try:
+                with METRICS.timer("stage_seconds", stage="snapshot_load"):
+                    loaded = load_snapshot(self.snapshot_path)
+            except Exception as e:
+                self.last_error = e
+                return
+            if loaded is None:
+                return
+            frame, state = loaded
+            self.header = state["header"]
+            self.rows_ingested = state["rows_ingested"]
+            self._last_row = state["last_row"]
+            self._sheet_data = ResponseData.from_frame(frame)
+            self._publish(self._sheet_data.frame)
+            # Backdate the sync time so age() reports how stale the snapshot is
+            self._synced_at = time.monotonic() - state["age_seconds"]
+            self.snapshot_info = {
+                "path": self.snapshot_path,
+                "rows": len(frame),
+                "load_seconds": state["load_seconds"],
+                "age_seconds": state["age_seconds"],
+            }
+
+    def _save_snapshot(self):
+        try:
+            with METRICS.timer("stage_seconds", stage="snapshot_save"):
+                save_snapshot(
+                    self.snapshot_path, self._sheet_data.frame, self.header, self.rows_ingested, self._last_row
+                )
+        except Exception as e:
+            # The snapshot is only a cold-start optimisation; never fail a sync over it
+            self.last_error = e
+
+    def _sync(self):
+        previous = self._sheet_data
+        full_reloads = self.full_reloads
+        try:
+            with METRICS.timer("stage_seconds", stage="sync"):
+                if self._full_reload_due() or not self._append_new_rows():
+                    self._full_reload()
+        except Exception:
+            METRICS.inc("sheet_syncs_total", result="error")
+            # Drop the handle so the next attempt re-authenticates
+            self._worksheet_handle = None
+            if self._clients is not None:
+                self._clients.discard(self._creds)
+            raise
+        METRICS.inc("sheet_syncs_total", result="ok")
+        self.last_error = None
+        self._synced_at = time.monotonic()
+        if self._sheet_data is not previous or self._pending:
+            # Only rows that weren't in the sheet before can match a pending push
+            new_rows = self._sheet_data.frame
+            if self.full_reloads == full_reloads:
+                new_rows = new_rows.iloc[len(previous):]
+            self._publish(new_rows)
+        if self.snapshot_path and self._sheet_data is not previous:
+            self._save_snapshot()
+
+    def _publish(self, new_rows):
+        """Swap in the sheet data plus any pushed rows it doesn't contain yet."""
+        unmatched = Counter(_row_keys(new_rows))
+        now = time.monotonic()
+        with self._publish_lock:
+            pending = []
+            for key, row, profile, pushed_at in self._pending:
+                if unmatched[key]:
+                    unmatched[key] -= 1
+                    METRICS.inc("pushed_rows_total", result="reconciled")
+                elif now - pushed_at > self.push_ttl:
+                    METRICS.inc("pushed_rows_total", result="expired")
+                else:
+                    pending.append((key, row, profile, pushed_at))
+            self._pending = pending
+            data = self._sheet_data
+            if pending:
+                data = data.append(
+                    pd.concat([row for _, row, _, _ in pending], ignore_index=True),
+                    pd.concat([profile for _, _, profile, _ in pending], ignore_index=True),
+                    data.cohort,
+                )
+            self.data = data
+
+    def _full_reload_due(self):
+        # _full_reloaded_at is unset before the first load and after a snapshot restore
+        return (
+            self._sheet_data is None
+            or self._full_reloaded_at is None
+            or time.monotonic() - self._full_reloaded_at >= self.full_reload_interval
+        )
+
+    def _full_reload(self):
+        with METRICS.timer("stage_seconds", stage="sheet_fetch", mode="full"):
+            values = self._worksheet().get_all_values()
+        if METRICS.enabled:
+            _record_fetch("full", values)
+        header, rows = (values[0], values[1:]) if values else ([], [])
+        self._sheet_data = ResponseData(_records_frame(header, rows))
+        self.header = header
+        self.rows_ingested = len(rows)
+        self._last_row = _pad(rows[-1], len(header)) if rows else None
+        self.full_reloads += 1
+        self._full_reloaded_at = time.monotonic()
+
+    def _append_new_rows(self):
+        """Fetch rows below the last ingested one; False if a full reload is needed."""
+        width = len(self.header)
+        if width == 0:
+            return False
+        last_col = rowcol_to_a1(1, width)[:-1]
+        # Re-read the last ingested row (or the header, for an empty sheet) as
+        # an anchor: deleting rows shifts it and triggers a full reload. Edits
+        # to earlier rows don't show up here; the periodic full reload covers them.
+        anchor_row = self.rows_ingested + 1
+        with METRICS.timer("stage_seconds", stage="sheet_fetch", mode="incremental"):
+            # The whole first row, so a column added past the old last one is noticed too
+            header_range, tail_range = self._worksheet().batch_get(["1:1", f"A{anchor_row}:{last_col}"])
+        if METRICS.enabled:
+            _record_fetch("incremental", list(header_range) + list(tail_range))
+        if not header_range or _trim(header_range[0]) != _trim(self.header):
+            return False
+        anchor = self._last_row if self._last_row is not None else _pad(self.header, width)
+        if not tail_range or _pad(tail_range[0], width) != anchor:
+            return False
+
+        new_rows = tail_range[1:]
+        self.incremental_syncs += 1
+        if not new_rows:
+            return True
+        self._sheet_data = self._sheet_data.append(_records_frame(self.header, new_rows))
+        self.rows_ingested += len(new_rows)
+        self._last_row = _pad(new_rows[-1], width)
+        return True
@@ -0,0 +1,68 @@
+"""Local Arrow IPC snapshot of the response data for fast cold starts.
+
+The snapshot holds the loaded frame plus the sync state SheetSync needs to
+carry on incrementally (header, row count and the last ingested row), so a
+restarted process can serve immediately and reconcile with the sheet in the
+background.
+
+Frames are written as SheetSync keeps them (app columns only, int8 scores),
+uncompressed, and read back through a memory map: null-free numeric columns
+stay views onto the mapped file, so processes loading the same snapshot share
+those pages through the OS page cache instead of each holding a copy. Only the
+frame is shared this way; the derived profile fields and indexes are still
+built on each process's own heap.
+"""
+import json
+import os
+import time
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+_METADATA_KEY = b"si_report"
+SNAPSHOT_VERSION = 3
+
+
+def save_snapshot(path, frame, header, rows_ingested, last_row):
+    """Write ``frame`` and its sync state to ``path`` atomically."""
+    state = {
+        "version": SNAPSHOT_VERSION,
+        "saved_at": time.time(),
+        "header": header,
+        "rows_ingested": rows_ingested,
+        "last_row": last_row,
+    }
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    table = table.replace_schema_metadata(
+        {**(table.schema.metadata or {}), _METADATA_KEY: json.dumps(state).encode()}
+    )
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    # Uncompressed so the file can be memory-mapped on load
+    feather.write_feather(table, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path):
+    """Return ``(frame, state)`` from ``path``, or None if there's no usable snapshot.
+
+    ``state`` also reports ``load_seconds`` and ``age_seconds``.
+    """
+    if not os.path.exists(path):
+        return None
+    started = time.perf_counter()
+    table = feather.read_table(path, memory_map=True)
+    metadata = (table.schema.metadata or {}).get(_METADATA_KEY)
+    if metadata is None:
+        return None
+    state = json.loads(metadata)
+    if state.get("version") != SNAPSHOT_VERSION:
+        return None
+    # One block per column so pandas doesn't consolidate (copy) them together
+    frame = table.to_pandas(split_blocks=True)
+    state["load_seconds"] = time.perf_counter() - started
+    state["age_seconds"] = max(0.0, time.time() - state["saved_at"])
+    return frame, state
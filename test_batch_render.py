@@ -0,0 +1,34 @@
+"""Tests for the headless batch renderer, run against the offline fake sheet."""
+import os
+
+import pytest
+
+import fake_sheets
+from batch_render import artifact_id, render_all
+from schema import SCORE_COLUMNS
+from sheet_sync import SheetSync, normalize_email
+
+
+@pytest.fixture
+def worksheet():
+    return fake_sheets.FakeWorksheet.generate(30)
+
+
+def load(worksheet):
+    with fake_sheets.install(worksheet):
+        return SheetSync({}).refresh()
+
+
+def test_only_new_submissions_are_re_rendered(worksheet, tmp_path):
+    data = load(worksheet)
+    rendered, unchanged, failures = render_all(data, tmp_path, workers=1, renderer="svg")
+    assert (rendered, unchanged, failures) == (len(data.submission_index), 0, {})
+    assert render_all(data, tmp_path, workers=1, renderer="svg") == (0, len(data.submission_index), {})
+
+    email = worksheet.values[1][1]
+    worksheet.append_rows([["12/31/2025 08:00:00", email, "Retake"] + ["10"] * len(SCORE_COLUMNS) + [""]])
+    rendered, _, _ = render_all(load(worksheet), tmp_path, workers=1, renderer="svg")
+    assert rendered == 1
+    with open(os.path.join(tmp_path, f"{artifact_id(normalize_email(email))}.html"), encoding="utf-8") as f:
+        page = f.read()
+    assert "Retake" in page and "Peak Performance Zone" in page
@@ -0,0 +1,59 @@
+"""Tests for the profile chart renderers."""
+import os
+import re
+import subprocess
+import sys
+
+import matplotlib
+import pandas as pd
+import pytest
+
+from charts import alignment_color, create_profile_chart, render_profile_svg
+from schema import SCORE_COLUMNS
+from scoring import numeric_scores
+
+matplotlib.use("Agg")
+
+# Growth Drive .. Strategic Generosity, then Mission .. Benefits
+SCORES = (5, 6, 7, 8, 8, 4, 2, 7.5)
+RED, ORANGE, GREEN = '#d62728', '#ff7f0e', '#2ca02c'
+
+
+def cleaned(scores):
+    """``scores`` as the float32 values charts are drawn from."""
+    return tuple(numeric_scores(pd.DataFrame([scores], columns=SCORE_COLUMNS)).iloc[0])
+
+
+def bold_labels(svg):
+    return re.findall(r'font-weight="bold"[^>]*><tspan[^>]*>([^<]*)</tspan>', svg.decode())
+
+
+def test_svg_bar_labels_show_whole_scores_without_a_decimal():
+    assert bold_labels(render_profile_svg(cleaned(SCORES))) == ["8", "4", "2", "7.5"]
+
+
+def test_matplotlib_bar_labels_show_whole_scores_without_a_decimal():
+    import matplotlib.pyplot as plt
+
+    fig = create_profile_chart(cleaned(SCORES))
+    try:
+        labels = [text.get_text() for text in fig.axes[1].texts]
+    finally:
+        plt.close(fig)
+    assert labels == ["8", "4", "2", "7.5"]
+
+
+@pytest.mark.parametrize("score, color", [(0, RED), (4, RED), (4.5, ORANGE), (7, ORANGE), (7.5, GREEN), (10, GREEN)])
+def test_alignment_bars_change_colour_above_4_and_above_7(score, color):
+    assert alignment_color(score) == color
+    svg = render_profile_svg((5,) * 4 + (score,) * 4).decode()
+    assert re.findall(r'<rect x="870"[^>]*fill="([^"]+)"', svg) == [color] * 4
+
+
+def test_the_svg_renderer_never_imports_matplotlib():
+    code = (
+        "import sys, charts\n"
+        "charts.ChartCache(renderer='svg').get((5,) * 8, (5,) * 8)\n"
+        "sys.exit('matplotlib' in sys.modules)\n"
+    )
+    assert subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(__file__)).returncode == 0
@@ -0,0 +1,30 @@
+"""Tests for the cohort distributions and percentile ranks."""
+import pandas as pd
+import pytest
+
+from cohort import CohortStats
+from schema import SCORE_COLUMNS
+from scoring import ZONE, numeric_scores, score_profiles
+
+COLUMN = SCORE_COLUMNS[0]
+
+
+def cohort_of(scores):
+    frame = pd.DataFrame({column: scores for column in SCORE_COLUMNS})
+    return CohortStats(numeric_scores(frame).to_numpy(), score_profiles(frame)[ZONE])
+
+
+@pytest.mark.parametrize("score, expected", [(0, 0.0), (2, 12.5), (5, 50.0), (8, 87.5), (10, 100.0)])
+def test_percentiles_count_ties_half(score, expected):
+    # 2 scores 2, 4 score 5, 2 score 8
+    assert cohort_of([2, 2, 5, 5, 5, 5, 8, 8]).percentile(COLUMN, score) == expected
+
+
+def test_everyone_tied_is_at_the_fiftieth_percentile():
+    assert cohort_of([6] * 5).percentile(COLUMN, 6) == 50.0
+
+
+def test_an_empty_cohort_has_no_percentiles():
+    cohort = cohort_of([])
+    assert cohort.percentile(COLUMN, 5) is None
+    assert cohort.medians is None
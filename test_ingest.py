@@ -0,0 +1,82 @@
+"""Tests for the push endpoint, served on a free local port."""
+import http.client
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+import fake_sheets
+from ingest import IngestServer, SubmissionError, parse_submission
+from schema import EMAIL_COLUMN, SCORE_COLUMNS
+from sheet_sync import SheetSync
+
+TOKEN = "test-token"
+
+
+@pytest.fixture
+def server():
+    worksheet = fake_sheets.FakeWorksheet.generate(20)
+    with fake_sheets.install(worksheet):
+        sync = SheetSync({})
+        sync.refresh()
+    server = IngestServer({"default": sync}, TOKEN, port=0).start()
+    yield server
+    server.stop()
+
+
+def request(server, path, body=None, token=TOKEN):
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    data = json.dumps(body).encode() if body is not None else None
+    try:
+        with urllib.request.urlopen(urllib.request.Request(server.url + path, data, headers)) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def named_values(email="pushed@example.com"):
+    return {"namedValues": {EMAIL_COLUMN: [email], "Name": ["Pushed"], **{c: ["6"] for c in SCORE_COLUMNS}}}
+
+
+def test_a_posted_submission_is_served_immediately(server):
+    status, _ = request(server, "/submissions", named_values())
+    assert status == 202
+    assert server.cohorts["default"].data.lookup("Pushed@Example.com")["Name"] == "Pushed"
+
+
+@pytest.mark.parametrize("path", ["/submissions", "/metrics", "/healthz"])
+def test_every_endpoint_requires_the_token(server, path):
+    body = named_values() if path == "/submissions" else None
+    assert request(server, path, body, token=None)[0] == 401
+    assert request(server, path, body, token="wrong")[0] == 401
+
+
+def test_healthz_reports_each_cohort(server):
+    status, body = request(server, "/healthz")
+    assert status == 200
+    assert json.loads(body)["default"]["rows"] == 20
+
+
+def test_unknown_cohorts_are_rejected(server):
+    assert request(server, "/submissions?cohort=nope", named_values())[0] == 404
+
+
+@pytest.mark.parametrize("length", ["abc", "-5"])
+def test_a_malformed_content_length_is_rejected(server, length):
+    connection = http.client.HTTPConnection(*server.server_address[:2], timeout=5)
+    connection.putrequest("POST", "/submissions")
+    connection.putheader("Authorization", f"Bearer {TOKEN}")
+    connection.putheader("Content-Length", length)
+    connection.endheaders()
+    assert connection.getresponse().status == 400
+    connection.close()
+
+
+def test_submissions_need_an_email_and_every_score():
+    with pytest.raises(SubmissionError):
+        parse_submission({"Name": "No Email"})
+    values = named_values()["namedValues"]
+    del values[SCORE_COLUMNS[-1]]
+    with pytest.raises(SubmissionError):
+        parse_submission(values)
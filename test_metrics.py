@@ -0,0 +1,62 @@
+"""Tests for the metrics registry and its Prometheus export."""
+import pytest
+
+from metrics import BUCKETS, Metrics
+
+
+@pytest.fixture
+def metrics():
+    metrics = Metrics()
+    metrics.configure(enabled=True)
+    return metrics
+
+
+def test_counters_are_exported_per_label_set(metrics):
+    metrics.inc("pushed_rows_total", result="applied")
+    metrics.inc("pushed_rows_total", 2, result="applied")
+    metrics.inc("pushed_rows_total", result="expired")
+    lines = metrics.render_prometheus().splitlines()
+    assert lines == [
+        "# TYPE si_report_pushed_rows_total counter",
+        'si_report_pushed_rows_total{result="applied"} 3',
+        'si_report_pushed_rows_total{result="expired"} 1',
+    ]
+
+
+def test_histograms_have_cumulative_buckets_sum_and_count(metrics):
+    metrics.observe("stage_seconds", 0.003, stage="sync")
+    metrics.observe("stage_seconds", 0.2, stage="sync")
+    metrics.observe("stage_seconds", 60, stage="sync")
+    lines = metrics.render_prometheus().splitlines()
+    assert lines[0] == "# TYPE si_report_stage_seconds histogram"
+    buckets = dict(line.rsplit(" ", 1) for line in lines[1:len(BUCKETS) + 2])
+    assert buckets['si_report_stage_seconds_bucket{stage="sync",le="0.001"}'] == "0"
+    assert buckets['si_report_stage_seconds_bucket{stage="sync",le="0.005"}'] == "1"
+    assert buckets['si_report_stage_seconds_bucket{stage="sync",le="0.25"}'] == "2"
+    assert buckets['si_report_stage_seconds_bucket{stage="sync",le="30.0"}'] == "2"
+    assert buckets['si_report_stage_seconds_bucket{stage="sync",le="+Inf"}'] == "3"
+    assert lines[-2:] == [
+        'si_report_stage_seconds_sum{stage="sync"} 60.203000',
+        'si_report_stage_seconds_count{stage="sync"} 3',
+    ]
+
+
+def test_label_values_are_escaped(metrics):
+    metrics.inc("errors_total", message='bad "quote"\nand \\')
+    assert 'errors_total{message="bad \\"quote\\"\\nand \\\\"} 1' in metrics.render_prometheus()
+
+
+def test_timer_observes_its_block(metrics):
+    with metrics.timer("stage_seconds", stage="render"):
+        pass
+    assert 'si_report_stage_seconds_count{stage="render"} 1' in metrics.render_prometheus()
+
+
+def test_a_disabled_registry_records_nothing():
+    metrics = Metrics()
+    with metrics.timer("stage_seconds", stage="sync"):
+        metrics.inc("pushed_rows_total", result="applied")
+        metrics.observe("stage_seconds", 1.0, stage="sync")
+    # The same shared no-op context manager every time, so timing costs nothing
+    assert metrics.timer("stage_seconds") is metrics.timer("other_seconds")
+    assert metrics.render_prometheus() == "\n"
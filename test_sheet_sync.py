@@ -0,0 +1,154 @@
+"""Tests for SheetSync's incremental loading, run against the offline fake sheet."""
+import pytest
+
+import fake_sheets
+from schema import SCORE_COLUMNS
+from sheet_sync import SheetSync
+
+GROWTH_DRIVE = fake_sheets.HEADER.index(SCORE_COLUMNS[0])
+
+
+@pytest.fixture
+def worksheet():
+    return fake_sheets.FakeWorksheet.generate(50)
+
+
+def sync_with(worksheet, **kwargs):
+    sync = SheetSync({}, **kwargs)
+    with fake_sheets.install(worksheet):
+        sync.refresh()
+    return sync
+
+
+def refresh(sync, worksheet):
+    with fake_sheets.install(worksheet):
+        return sync.refresh()
+
+
+def test_appended_rows_are_fetched_incrementally(worksheet):
+    sync = sync_with(worksheet)
+    worksheet.append_generated(5)
+    data = refresh(sync, worksheet)
+    assert len(data) == 55
+    assert (sync.full_reloads, sync.incremental_syncs) == (1, 1)
+
+
+def test_edits_above_the_tail_are_picked_up_by_the_periodic_full_reload(worksheet):
+    sync = sync_with(worksheet, full_reload_interval=0)
+    worksheet.values[3][GROWTH_DRIVE] = "10" if worksheet.values[3][GROWTH_DRIVE] != "10" else "0"
+    data = refresh(sync, worksheet)
+    assert sync.full_reloads == 2
+    assert data.row(2)[SCORE_COLUMNS[0]] == int(worksheet.values[3][GROWTH_DRIVE])
+
+
+def test_edits_above_the_tail_wait_for_the_full_reload_interval(worksheet):
+    sync = sync_with(worksheet, full_reload_interval=3600)
+    worksheet.values[3][GROWTH_DRIVE] = "10" if worksheet.values[3][GROWTH_DRIVE] != "10" else "0"
+    refresh(sync, worksheet)
+    assert sync.full_reloads == 1
+
+
+def test_a_new_trailing_column_triggers_a_full_reload(worksheet):
+    sync = sync_with(worksheet)
+    worksheet.values[0].append("New Question")
+    refresh(sync, worksheet)
+    assert sync.full_reloads == 2
+    assert sync.header[-1] == "New Question"
+
+
+def test_deleted_rows_trigger_a_full_reload(worksheet):
+    sync = sync_with(worksheet)
+    del worksheet.values[10]
+    data = refresh(sync, worksheet)
+    assert sync.full_reloads == 2
+    assert len(data) == 49
+
+
+def test_cohort_stats_count_each_respondent_once(worksheet):
+    retake = ["12/31/2025 08:00:00", worksheet.values[1][1], "Retake"] + ["10"] * len(SCORE_COLUMNS) + [""]
+    worksheet.append_rows([retake])
+    data = sync_with(worksheet).data
+    assert len(data) == len(worksheet.values) - 1
+    assert data.cohort.size == len(data.submission_index) < len(data)
+    assert data.cohort.histograms[SCORE_COLUMNS[0]].sum() == data.cohort.size
+    assert data.cohort.zone_counts.sum() == data.cohort.size
+
+
+def test_lookups_return_the_latest_submission(worksheet):
+    email = worksheet.values[1][1]
+    retake = ["12/31/2025 08:00:00", email, "Retake"] + ["10"] * len(SCORE_COLUMNS) + [""]
+    worksheet.append_rows([retake])
+    # An earlier-dated row added afterwards doesn't take its place
+    worksheet.append_rows([["1/1/2020 08:00:00", email, "Backfilled"] + ["1"] * len(SCORE_COLUMNS) + [""]])
+    data = sync_with(worksheet).data
+    assert data.lookup(email.upper())["Name"] == "Retake"
+    assert data.profile(email)[SCORE_COLUMNS[0]] == 10
+
+
+def submission(worksheet, email="new.person@example.com"):
+    return dict(zip(fake_sheets.HEADER, ["1/2/2025 10:00:00", email, "New Person"] + ["8"] * len(SCORE_COLUMNS) + [""]))
+
+
+def test_a_pushed_row_is_served_before_the_sheet_has_it(worksheet):
+    sync = sync_with(worksheet)
+    record = submission(worksheet)
+    data = sync.push(record)
+    assert data.lookup(record[fake_sheets.EMAIL_COLUMN]) is not None
+    assert sync.pending_pushes == 1
+
+    worksheet.append_rows([list(record.values())])
+    data = refresh(sync, worksheet)
+    assert sync.pending_pushes == 0
+    assert len(data.submissions(record[fake_sheets.EMAIL_COLUMN])) == 1
+
+
+def test_pushed_rows_join_the_cohort_stats_once_the_sheet_has_them(worksheet):
+    sync = sync_with(worksheet)
+    cohort = sync.data.cohort
+    record = submission(worksheet)
+    assert sync.push(record).cohort is cohort
+
+    worksheet.append_rows([list(record.values())])
+    assert refresh(sync, worksheet).cohort.size == cohort.size + 1
+
+
+def test_a_push_for_a_row_the_sheet_already_synced_is_not_duplicated(worksheet):
+    # Forms writes the row before the trigger posts it, so a sync can get there first
+    sync = sync_with(worksheet)
+    record = submission(worksheet)
+    worksheet.append_rows([list(record.values())])
+    refresh(sync, worksheet)
+
+    data = sync.push(record)
+    assert sync.pending_pushes == 0
+    data = refresh(sync, worksheet)
+    assert sync.pending_pushes == 0
+    assert len(data.submissions(record[fake_sheets.EMAIL_COLUMN])) == 1
+
+
+def test_a_push_the_sheet_never_shows_expires(worksheet):
+    sync = sync_with(worksheet, push_ttl=0)
+    record = submission(worksheet, "ghost@example.com")
+    sync.push(record)
+    data = refresh(sync, worksheet)
+    assert sync.pending_pushes == 0
+    assert data.lookup("ghost@example.com") is None
+
+
+def test_a_restored_snapshot_is_served_before_the_first_fetch_and_synced_on(worksheet, tmp_path):
+    path = str(tmp_path / "responses.arrow")
+    sync_with(worksheet, snapshot_path=path)
+
+    restored = SheetSync({}, snapshot_path=path)
+    # No fake sheet installed: serving the snapshot must not touch the API
+    restored.start(background=False)
+    assert len(restored.data) == 50
+    assert restored.snapshot_info["rows"] == 50
+    assert restored.data.frame[SCORE_COLUMNS].dtypes.map(lambda dtype: dtype.itemsize).eq(1).all()
+
+    # The first sync re-reads the sheet for edits made while down; the next is incremental
+    worksheet.append_generated(5)
+    assert len(refresh(restored, worksheet)) == 55
+    worksheet.append_generated(5)
+    assert len(refresh(restored, worksheet)) == 60
+    assert (restored.full_reloads, restored.incremental_syncs) == (1, 1)